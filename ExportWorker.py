@@ -0,0 +1,38 @@
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from exporter import ExportCancelled
+
+
+class ExportWorker(QThread):
+    """
+    Background thread running one Exporter method on (dealers, target), e.g.
+    ExportWorker(exporter.export_all_dealers, dealer_names, filename), where
+    dealers is a dealer name for export_single_dealer. The method gets
+    progress_callback/should_cancel keyword arguments;
+    requestInterruption() cancels the job without leaving a partial file.
+    """
+    progress = pyqtSignal(int, int, int)  # dealers done, total dealers, rows written
+    export_done = pyqtSignal(str)
+    export_failed = pyqtSignal(str)
+    export_cancelled = pyqtSignal()
+
+    def __init__(self, export_method, dealers, target):
+        super().__init__()
+        self.export_method = export_method
+        self.dealers = dealers
+        self.target = target
+
+    def run(self):
+        try:
+            self.export_method(
+                self.dealers, self.target,
+                progress_callback=self.progress.emit,
+                should_cancel=self.isInterruptionRequested,
+            )
+        except ExportCancelled:
+            self.export_cancelled.emit()
+        except Exception as e:
+            print(f"Error during export to {self.target}: {e}")
+            self.export_failed.emit(str(e))
+        else:
+            self.export_done.emit(self.target)
@@ -0,0 +1,69 @@
+import threading
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from ui_formatter import UIFormatter
+
+
+class PersonnelAnalysisWorker(QThread):
+    """
+    Long-lived thread that analyzes and renders one personnel selection at a
+    time. submit() replaces a request that has not started yet, so only the
+    latest selection is analyzed; results carry the request id so the caller
+    can drop the ones it no longer wants. drain() waits until the worker is
+    idle (e.g. before the data is reloaded); stop() ends the thread.
+    """
+    analysis_ready = pyqtSignal(int, str)  # request id, rendered HTML
+    analysis_failed = pyqtSignal(int, str)  # request id, error message
+
+    def __init__(self, analyzer):
+        super().__init__()
+        self.analyzer = analyzer
+        self._request = None
+        self._busy = False
+        self._stopping = False
+        self._condition = threading.Condition()
+
+    def submit(self, request_id, pcode, dealer_name, position):
+        with self._condition:
+            self._request = (request_id, pcode, dealer_name, position)
+            self._condition.notify_all()
+
+    def drain(self):
+        """Drops any queued request and waits for the one in progress."""
+        with self._condition:
+            self._request = None
+            while self._busy:
+                self._condition.wait()
+
+    def stop(self):
+        """Drops any queued request, waits for the one in progress and ends the thread."""
+        with self._condition:
+            self._stopping = True
+            self._request = None
+            self._condition.notify_all()
+        self.wait()
+
+    def run(self):
+        while True:
+            with self._condition:
+                while self._request is None and not self._stopping:
+                    self._condition.wait()
+                if self._stopping:
+                    return
+                request_id, pcode, dealer_name, position = self._request
+                self._request = None
+                self._busy = True
+
+            try:
+                analysis_result = self.analyzer.analyze_personnel_training(pcode, dealer_name, position)
+                html_content = UIFormatter.format_personnel_details_html(analysis_result)
+            except Exception as e:
+                print(f"Error analyzing {pcode} ({position}) at {dealer_name}: {e}")
+                self.analysis_failed.emit(request_id, str(e))
+            else:
+                self.analysis_ready.emit(request_id, html_content)
+
+            with self._condition:
+                self._busy = False
+                self._condition.notify_all()
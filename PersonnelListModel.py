@@ -0,0 +1,63 @@
+from PyQt5.QtCore import Qt, QAbstractListModel, QModelIndex
+from PyQt5.QtGui import QColor
+
+# Role holding "name pcode position", used by the type-to-filter proxy
+FILTER_ROLE = Qt.UserRole + 1
+
+
+class PersonnelListModel(QAbstractListModel):
+    """
+    Read-only list model over a roles table (dealer, pcode, name, position),
+    e.g. TrainingAnalyzer.get_personnel_roles(). Rows are only formatted when
+    a view asks for them; roles whose position is not in position_mapping are
+    shown gray and cannot be selected. Qt.UserRole returns the
+    {'pcode', 'position', 'dealer_name'} dict of a row.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._dealers = []
+        self._pcodes = []
+        self._names = []
+        self._positions = []
+        self._selectable = []
+
+    def set_roles(self, roles, position_mapping=()):
+        """Replaces the listed roles; an empty table clears the list."""
+        self.beginResetModel()
+        self._dealers = roles['dealer'].tolist()
+        self._pcodes = roles['pcode'].tolist()
+        self._names = roles['name'].tolist()
+        self._positions = roles['position'].tolist()
+        self._selectable = [pos in position_mapping for pos in self._positions]
+        self.endResetModel()
+
+    def clear(self):
+        self.beginResetModel()
+        self._dealers = self._pcodes = self._names = self._positions = self._selectable = []
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._positions)
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        if self._selectable[index.row()]:
+            return Qt.ItemIsEnabled | Qt.ItemIsSelectable
+        return Qt.ItemIsEnabled
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+
+        row = index.row()
+        if role == Qt.DisplayRole:
+            return f"{self._dealers[row][:4]} | {self._names[row]} | {self._positions[row]} | {self._pcodes[row]}"
+        if role == Qt.ForegroundRole and not self._selectable[row]:
+            return QColor('gray')
+        if role == Qt.UserRole:
+            return {'pcode': self._pcodes[row], 'position': self._positions[row], 'dealer_name': self._dealers[row]}
+        if role == FILTER_ROLE:
+            return f"{self._names[row]} {self._pcodes[row]} {self._positions[row]}"
+        return None
@@ -0,0 +1,57 @@
+import threading
+from collections import deque
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+
+class SummaryPrefetcher(QThread):
+    """
+    Background thread that warms a per-dealer cache by calling warm(dealer)
+    for each dealer in order, e.g. SummaryPrefetcher(window.warm_dealer, names).
+    prioritize() moves a dealer to the front of the queue;
+    requestInterruption() stops it after the dealer in progress.
+    """
+    dealer_warmed = pyqtSignal(str)
+
+    def __init__(self, warm, dealer_names):
+        super().__init__()
+        self.warm = warm
+        self._queue = deque(dealer_names)
+        self._current = None
+        self._lock = threading.Lock()
+
+    def prioritize(self, dealer_name):
+        """
+        Moves dealer_name to the front of the queue. Returns True while the
+        dealer is still pending (queued or being warmed), i.e. while a
+        dealer_warmed signal for it is still to come.
+        """
+        with self._lock:
+            if dealer_name == self._current:
+                return True
+            try:
+                self._queue.remove(dealer_name)
+            except ValueError:
+                return False
+            self._queue.appendleft(dealer_name)
+            return True
+
+    def _next_dealer(self):
+        with self._lock:
+            self._current = self._queue.popleft() if self._queue else None
+            return self._current
+
+    def run(self):
+        while not self.isInterruptionRequested():
+            dealer_name = self._next_dealer()
+            if dealer_name is None:
+                break
+            try:
+                self.warm(dealer_name)
+            except Exception as e:
+                print(f"⚠️ Prefetch failed for dealer '{dealer_name}': {e}")
+            self.dealer_warmed.emit(dealer_name)
+            self.yieldCurrentThread()
+
+        with self._lock:
+            self._current = None
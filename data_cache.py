@@ -0,0 +1,150 @@
+# data_cache.py
+import hashlib
+import json
+import os
+
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401  (only needed for the Parquet backend)
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+# Bump whenever the loaders change what they produce, so stale entries are rebuilt.
+CACHE_VERSION = 3
+MANIFEST_NAME = 'manifest.json'
+
+
+def file_fingerprint(path):
+    """Returns size, mtime and SHA-256 of a file, or None if it does not exist."""
+    if not os.path.exists(path):
+        return None
+
+    stat = os.stat(path)
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            sha.update(block)
+
+    return {
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'sha256': sha.hexdigest(),
+    }
+
+
+class WorkbookCache:
+    """
+    Persistent cache of sanitized workbook DataFrames.
+
+    Each workbook is stored as one Parquet file per sheet (pickle when pyarrow
+    is not installed or a frame cannot be written as Parquet). An entry is only
+    reused while the workbook and every dependency file (e.g. the dealer mapping)
+    still have the same size, mtime and content hash.
+    """
+
+    def __init__(self, cache_dir, dependency_paths=()):
+        self.cache_dir = cache_dir
+        self.dependency_paths = list(dependency_paths)
+        self.manifest_path = os.path.join(cache_dir, MANIFEST_NAME)
+
+    def _read_manifest(self):
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if manifest.get('version') != CACHE_VERSION:
+            return {}
+        return manifest.get('entries', {})
+
+    def _write_manifest(self, entries):
+        tmp_path = self.manifest_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': CACHE_VERSION, 'entries': entries}, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    def _cache_key(self, file_path):
+        return {
+            'source': file_fingerprint(file_path),
+            'dependencies': {path: file_fingerprint(path) for path in self.dependency_paths},
+        }
+
+    def load(self, file_path):
+        """
+        Returns the cached result for file_path (a DataFrame, or a dict of
+        DataFrames for multi-sheet workbooks), or None on a cache miss.
+        """
+        entry = self._read_manifest().get(os.path.basename(file_path))
+        if not entry or entry.get('key') != self._cache_key(file_path):
+            return None
+
+        try:
+            sheets = {}
+            for sheet in entry['sheets']:
+                path = os.path.join(self.cache_dir, sheet['file'])
+                if sheet['format'] == 'parquet':
+                    sheets[sheet['name']] = pd.read_parquet(path)
+                else:
+                    sheets[sheet['name']] = pd.read_pickle(path)
+        except Exception as e:
+            print(f"Error reading cache for {file_path}: {e}")
+            return None
+
+        if entry['single']:
+            return next(iter(sheets.values()))
+        return sheets
+
+    def store(self, file_path, data):
+        """
+        Caches a loader result for file_path. Empty results are not cached.
+        Sheet files of the previous entry that the new one no longer uses
+        (fewer sheets, or another format) are deleted.
+        """
+        single = isinstance(data, pd.DataFrame)
+        sheets = {'': data} if single else data
+        if not sheets or all(df.empty for df in sheets.values()):
+            return
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        stem = os.path.splitext(os.path.basename(file_path))[0]
+
+        try:
+            written = []
+            for idx, (sheet_name, df) in enumerate(sheets.items()):
+                base = os.path.join(self.cache_dir, f"{stem}_{idx}")
+                fmt = self._write_frame(df, base)
+                written.append({'name': sheet_name, 'file': f"{stem}_{idx}.{fmt}", 'format': fmt})
+
+            entries = self._read_manifest()
+            previous = entries.get(os.path.basename(file_path))
+            entries[os.path.basename(file_path)] = {
+                'key': self._cache_key(file_path),
+                'single': single,
+                'sheets': written,
+            }
+            self._write_manifest(entries)
+        except Exception as e:
+            print(f"Error writing cache for {file_path}: {e}")
+            return
+
+        if previous:
+            current = {sheet['file'] for sheet in written}
+            for sheet in previous.get('sheets', []):
+                if sheet['file'] not in current:
+                    try:
+                        os.remove(os.path.join(self.cache_dir, sheet['file']))
+                    except OSError:
+                        pass  # already gone
+
+    def _write_frame(self, df, base):
+        """Writes df as Parquet if possible, otherwise pickle. Returns the format used."""
+        if PARQUET_AVAILABLE:
+            try:
+                df.to_parquet(base + '.parquet')
+                return 'parquet'
+            except Exception:
+                pass  # e.g. non-string column names; fall back to pickle
+        df.to_pickle(base + '.pkl')
+        return 'pkl'
@@ -1,17 +1,99 @@
 # data_manager.py
+import numpy as np
 import pandas as pd
 import os
 import csv
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from pandas.api.types import CategoricalDtype
+
+from raw_loader import load_sanitized_data, load_sanitized_data_streaming, load_all_sanitized_sheets
+from data_cache import WorkbookCache
+
+def _timed_load(loader, file_path):
+    """Runs a workbook loader and returns (result, elapsed seconds); picklable for worker processes."""
+    start = time.perf_counter()
+    data = loader(file_path)
+    return data, time.perf_counter() - start
+
+
+# Columns encoded as categoricals, and the vocabulary each one shares with
+# the same kind of value in other columns and frames.
+CATEGORICAL_COLUMNS = {
+    'عنوان نمایندگی': 'dealer',
+    'company': 'company',
+    'کد پرسنلی': 'pcode',
+    'عنوان شغل': 'position',
+    'شغل موازی (ارتقا)': 'position',
+    'عنوان دوره': 'course',
+    'نام دوره آموزشی': 'course',
+}
+
+
+def _sheet_text(df, col):
+    """A requirement sheet column as stripped strings ('' when the column is missing)."""
+    if col not in df.columns:
+        return pd.Series('', index=df.index)
+    return df[col].astype(str).str.strip()
+
+
+def _contains(values, keyword):
+    """Vectorized `keyword in value` over a Series of strings."""
+    return values.str.contains(keyword, regex=False, na=False)
+
+
+def _filter_positions(positions, keyword):
+    """Keeps only the '&&&'-separated positions that contain keyword."""
+    if positions.empty:
+        return positions
+    parts = positions.str.split('&&&').explode()
+    kept = parts[_contains(parts, keyword)]
+    joined = kept.groupby(level=0, sort=False).agg('&&&'.join)
+    return joined.reindex(positions.index, fill_value='').str.strip()
+
+
+def _rewrite_mechanic_positions(positions):
+    """
+    Strips each '&&&'-separated position and maps mechanic positions to
+    'مکانیک سیبا موتور'; missing values stay missing.
+    """
+    present = positions.dropna()
+    if present.empty:
+        return positions
+    parts = present.str.split('&&&').explode().str.strip()
+    parts = parts.mask(_contains(parts, 'مکانیک'), 'مکانیک سیبا موتور')
+    return parts.groupby(level=0, sort=False).agg('&&&'.join).reindex(positions.index)
 
-from raw_loader import load_sanitized_data, load_all_sanitized_sheets
 
 class DataManager:
     """Handles loading and managing all application data and mappings."""
 
-    def __init__(self, resource_path="res/", mapping_path="mappings/"):
+    def __init__(self, resource_path="res/", mapping_path="mappings/", cache_path=None,
+                 raw_chunk_size=None, workers=None):
         self.resource_path = resource_path
         self.mapping_path = mapping_path
 
+        # When set, raw.xlsx is streamed in chunks of this many rows (bounded memory)
+        self.raw_chunk_size = raw_chunk_size
+        # When set, workbooks are parsed in a pool of this many processes
+        self.workers = workers
+        self.load_timings = {}
+
+        # Parsed-workbook cache lives next to the resource folder by default
+        if cache_path is None:
+            cache_path = os.path.join(os.path.dirname(os.path.normpath(resource_path)), "cache")
+        self.cache = WorkbookCache(
+            cache_path,
+            dependency_paths=[os.path.join(mapping_path, 'dealer_mapping.csv')],
+        )
+
+        # Bumped whenever loaded data or mappings change; memoized results compare against it
+        self.data_version = 0
+        # Makes invalidation and storing a freshly built lookup table atomic (see _keep_derived)
+        self._derived_lock = threading.Lock()
+
         self.raw = pd.DataFrame()
         self.dealers = pd.DataFrame()
         self.after_sheets = {}
@@ -22,15 +104,193 @@ class DataManager:
         self.company_mapping = {}
         self.course_mapping = {}
         self.bdc_to_smc_map = {}
+        self.vocabularies = {}
+
+    @property
+    def raw(self):
+        """Sanitized training records; assigning a new frame invalidates the row indexes."""
+        return self._raw
+
+    @raw.setter
+    def raw(self, df):
+        self._raw = df
+        self.invalidate_derived_data()
+
+    @property
+    def after_sheets(self):
+        """After-sales requirement sheets by company; assigning invalidates the requirements index."""
+        return self._after_sheets
+
+    @after_sheets.setter
+    def after_sheets(self, sheets):
+        self._after_sheets = sheets
+        self.invalidate_derived_data()
+
+    @property
+    def sales_sheets(self):
+        """Sales requirement sheets by company; assigning invalidates the requirements index."""
+        return self._sales_sheets
+
+    @sales_sheets.setter
+    def sales_sheets(self, sheets):
+        self._sales_sheets = sheets
+        self.invalidate_derived_data()
+
+    def invalidate_derived_data(self):
+        """
+        Drops the lookup tables derived from the loaded data and mappings (they
+        are rebuilt on next use) and bumps data_version. Called automatically
+        when raw or the requirement sheets are replaced and after the mapping
+        files are reloaded; call it after editing a mapping dict in place.
+        """
+        with self._derived_lock:
+            self.data_version += 1
+            self._dealer_rows = None
+            self._personnel_index = None
+            self._requirements_index = None
 
+    def _keep_derived(self, version, **tables):
+        """
+        Stores lookup tables built from the data of `version`, unless the data
+        was replaced while they were being built (e.g. a reload on another
+        thread); the caller still uses its result, it is just not kept.
+        """
+        with self._derived_lock:
+            if self.data_version == version:
+                for attr, table in tables.items():
+                    setattr(self, attr, table)
+
+    def _get_dealer_rows(self):
+        """Returns {dealer name: row positions in raw}, built once per raw frame."""
+        dealer_rows = self._dealer_rows
+        if dealer_rows is None:
+            version = self.data_version
+            raw = self._raw
+            if 'عنوان نمایندگی' in raw.columns:
+                dealer_rows = raw.groupby('عنوان نمایندگی', observed=True, sort=False).indices
+            else:
+                dealer_rows = {}
+            self._keep_derived(version, _dealer_rows=dealer_rows)
+        return dealer_rows
 
-    def load_all_data(self):
-        """Loads all data files and mappings from disk."""
+    def _get_personnel_records(self):
+        """
+        Returns {(pcode, dealer name): record} for every person in raw, where
+        record holds the person's name and raw company (from their first row),
+        the frozenset of their passed courses after course_mapping, and the
+        same courses as a bitset over the interned course ids (passed_bits).
+        """
+        return self._get_personnel_index()[0]
+
+    def _get_personnel_index(self):
+        """Returns (personnel records, course ids), built together once per raw frame."""
+        personnel_index = self._personnel_index
+        if personnel_index is None:
+            version = self.data_version
+            raw = self._raw
+            records = {}
+            course_ids = {}
+            if not raw.empty:
+                courses = raw['عنوان دوره']
+                mapped_courses = courses.map(lambda c: self.course_mapping.get(c, c)).astype(object)
+                mapped_courses = mapped_courses.where(courses.notna(), None)
+                course_codes, course_names = pd.factorize(mapped_courses)
+                course_ids = {course: bit for bit, course in enumerate(course_names)}
+
+                for pcode, dealer, name, company, course, bit in zip(
+                        raw['کد پرسنلی'], raw['عنوان نمایندگی'], raw['نام و نام خانوادگی'],
+                        raw['company'], mapped_courses, course_codes):
+                    record = records.get((pcode, dealer))
+                    if record is None:
+                        record = records[(pcode, dealer)] = {
+                            'name': name, 'company': company, 'passed_courses': set(), 'passed_bits': 0}
+                    if course is not None:
+                        record['passed_courses'].add(course)
+                        record['passed_bits'] |= 1 << int(bit)
+
+                for record in records.values():
+                    record['passed_courses'] = frozenset(record['passed_courses'])
+            personnel_index = (records, course_ids)
+            self._keep_derived(version, _personnel_index=personnel_index)
+        return personnel_index
+
+    def get_course_ids(self):
+        """
+        Returns {course: bit index} for the course names (after course_mapping)
+        used in the passed_bits bitsets. Courses first seen by course_bitset are
+        appended, so ids stay stable until the derived data is invalidated.
+        """
+        return self._get_personnel_index()[1]
+
+    def course_bitset(self, courses):
+        """Returns an iterable of course names as a bitset (int) over get_course_ids()."""
+        course_ids = self.get_course_ids()
+        bits = 0
+        for course in courses:
+            bit = course_ids.get(course)
+            if bit is None:
+                bit = course_ids[course] = len(course_ids)
+            bits |= 1 << bit
+        return bits
+
+    def get_requirements_index(self):
+        """
+        Returns the requirement sheets indexed as
+        {(company, section, position, car): (first row, {criteria: [courses]})}
+        where company is the sheet name, section is 'after' or 'sales' and
+        sales requirements use the car 'فروش'. Criteria keep sheet order and
+        first row is where the group first appears, so callers can merge
+        several cars in the same order a row-by-row scan would produce.
+        """
+        index = self._requirements_index
+        if index is None:
+            version = self.data_version
+            index = {}
+            for section, sheets in (('after', self.after_sheets), ('sales', self.sales_sheets)):
+                for company, df in sheets.items():
+                    positions = _sheet_text(df, 'پست کاری')
+                    criteria = _sheet_text(df, 'نام سرفصل')
+                    courses = _sheet_text(df, 'نام دوره آموزشی')
+                    if section == 'after':
+                        cars = _sheet_text(df, 'نام خودرو').replace('', 'عمومی')
+                        valid = (criteria.str.lower() != 'nan') & (courses.str.lower() != 'nan')
+                    else:
+                        cars = pd.Series('فروش', index=df.index)
+                        valid = (criteria != 'nan') & (courses != 'nan')
+                    valid &= (criteria != '') & (courses != '')
+
+                    for row_idx, (pos, car, crit, course) in enumerate(
+                            zip(positions[valid], cars[valid], criteria[valid], courses[valid])):
+                        key = (company, section, pos, car)
+                        if key not in index:
+                            index[key] = (row_idx, defaultdict(list))
+                        index[key][1][crit].append(course)
+            self._keep_derived(version, _requirements_index=index)
+        return index
+
+    def get_personnel_record(self, pcode, dealer_name):
+        """Returns the precomputed name/company/passed-courses record of a person at a dealer, or None."""
+        return self._get_personnel_records().get((pcode, dealer_name))
+
+    def load_all_data(self, force_reload=False, progress_callback=None, stage_callback=None):
+        """
+        Loads all data files and mappings from disk.
+        Unchanged workbooks are read from the parsed-data cache unless
+        force_reload is True, in which case every workbook is re-parsed.
+        progress_callback receives the number of raw rows processed when
+        raw.xlsx is streamed (see raw_chunk_size). stage_callback receives
+        'parsed' once every workbook is parsed and sanitized, then 'mappings'
+        once the mappings and the dual-dealer split are applied (dealer names
+        are final from then on).
+        """
         # Load data files
-        self.raw = load_sanitized_data(os.path.join(self.resource_path, "raw.xlsx"))
-        self.dealers = load_sanitized_data(os.path.join(self.resource_path, "dealers.xlsx"))
-        self.after_sheets = load_all_sanitized_sheets(os.path.join(self.resource_path, "after.xlsx"))
-        self.sales_sheets = load_all_sanitized_sheets(os.path.join(self.resource_path, "sales.xlsx"))
+        workbooks = self._load_workbooks(force_reload, progress_callback)
+        self.raw = workbooks["raw.xlsx"]
+        self.dealers = workbooks["dealers.xlsx"]
+        self.after_sheets = workbooks["after.xlsx"]
+        self.sales_sheets = workbooks["sales.xlsx"]
+        if stage_callback:
+            stage_callback('parsed')
 
         # Load all mappings
         self._load_mapping_file('position_mapping.csv', self.position_mapping)
@@ -38,113 +298,172 @@ class DataManager:
         self._load_mapping_file('company_mapping.csv', self.company_mapping)
         self._load_mapping_file('course_mapping.csv', self.course_mapping)
         self._load_mapping_file('dealer_mappings.csv', self.bdc_to_smc_map)
+        self.invalidate_derived_data()
 
         self.load_bdc_to_smc_mapping()
         self.apply_dual_dealer_logic()
+        self.encode_categoricals()
+        if stage_callback:
+            stage_callback('mappings')
 
+    def build_indexes(self):
+        """Builds the lazily derived lookup tables now (e.g. on a loader thread) instead of on first use."""
+        self._get_dealer_rows()
+        self._get_personnel_records()
+        self.get_requirements_index()
 
+    def encode_categoricals(self):
+        """
+        Dictionary-encodes the low-cardinality columns of `raw` and the
+        requirement sheets with one shared vocabulary per kind of value
+        (see CATEGORICAL_COLUMNS), so equality filters compare integer codes
+        and the same course name is stored once across all frames.
+        """
+        frames = [self.raw] + list(self.after_sheets.values()) + list(self.sales_sheets.values())
 
+        values = defaultdict(set)
+        for df in frames:
+            for col, vocab in CATEGORICAL_COLUMNS.items():
+                if col in df.columns:
+                    values[vocab].update(df[col].dropna().unique())
 
-    def apply_dual_dealer_logic(self):
-        if 'company' not in self.raw.columns or 'عنوان نمایندگی' not in self.raw.columns:
-            return
-
-        def _filter_positions(position_str, keyword):
-            if not position_str:
-                return ''
-            parts = position_str.split('&&&')
-            filtered = [p for p in parts if keyword in p]
-            return '&&&'.join(filtered).strip()
-
-        new_rows = []
-        for idx, row in self.raw.iterrows():
-            company = row['company']
-            dealer_name = row['عنوان نمایندگی']
-            dealer_code = str(dealer_name).split(" ")[0]
-
-            if company != 'bdc' or dealer_code not in self.bdc_to_smc_map:
-                new_rows.append(row)
-                continue
-
-            main_pos = str(row.get('عنوان شغل', '') or '')
-            alt_pos = str(row.get('شغل موازی (ارتقا)', '') or '')
-            full_pos = main_pos + '&&&' + alt_pos if alt_pos else main_pos
-
-            diesel_present = 'دیزل' in full_pos
-            siba_present = 'سیبا' in full_pos
+        self.vocabularies = {vocab: CategoricalDtype(sorted(v)) for vocab, v in values.items()}
 
+        for df in frames:
+            for col, vocab in CATEGORICAL_COLUMNS.items():
+                if col in df.columns:
+                    df[col] = df[col].astype(self.vocabularies[vocab])
 
-            if diesel_present and not siba_present:
-                new_rows.append(row)
+    def _load_workbooks(self, force_reload=False, progress_callback=None):
+        """
+        Loads every workbook through the cache, parsing only the misses.
+        With `workers` set, misses are parsed concurrently in a process pool
+        (and a streamed raw.xlsx has its chunks sanitized by the same pool).
+        Per-file wall-clock seconds are stored in self.load_timings.
+        """
+        loaders = {
+            "raw.xlsx": load_sanitized_data,
+            "dealers.xlsx": load_sanitized_data,
+            "after.xlsx": load_all_sanitized_sheets,
+            "sales.xlsx": load_all_sanitized_sheets,
+        }
+        results = {}
+        self.load_timings = {}
+
+        misses = []
+        for filename in loaders:
+            file_path = os.path.join(self.resource_path, filename)
+            start = time.perf_counter()
+            cached = None if force_reload else self.cache.load(file_path)
+            if cached is not None:
+                results[filename] = cached
+                self.load_timings[filename] = time.perf_counter() - start
+            else:
+                misses.append(filename)
+
+        def stream_raw(executor=None):
+            start = time.perf_counter()
+            results["raw.xlsx"] = load_sanitized_data_streaming(
+                os.path.join(self.resource_path, "raw.xlsx"), chunk_size=self.raw_chunk_size,
+                progress_callback=progress_callback, executor=executor,
+            )
+            self.load_timings["raw.xlsx"] = time.perf_counter() - start
+
+        stream = "raw.xlsx" in misses and bool(self.raw_chunk_size)
+        whole_files = [filename for filename in misses if not (stream and filename == "raw.xlsx")]
+
+        if self.workers and misses:
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                futures = {
+                    filename: pool.submit(_timed_load, loaders[filename], os.path.join(self.resource_path, filename))
+                    for filename in whole_files
+                }
+                if stream:
+                    stream_raw(pool)
+                for filename, future in futures.items():
+                    results[filename], self.load_timings[filename] = future.result()
+        else:
+            if stream:
+                stream_raw()
+            for filename in whole_files:
+                results[filename], self.load_timings[filename] = _timed_load(
+                    loaders[filename], os.path.join(self.resource_path, filename))
 
-            elif siba_present and not diesel_present:
-                new_row = row.copy()
-                new_row['company'] = 'smc'
-                new_row['عنوان نمایندگی'] = self.bdc_to_smc_map[dealer_code]
-                new_rows.append(new_row)
+        for filename in misses:
+            self.cache.store(os.path.join(self.resource_path, filename), results[filename])
 
-            elif diesel_present and siba_present:
+        for filename in loaders:
+            source = "parsed" if filename in misses else "cached"
+            print(f"⏱ {filename}: {self.load_timings[filename]:.2f}s ({source})")
 
-                bdc_row = row.copy()
-                bdc_row['company'] = 'bdc'
-                bdc_row['عنوان نمایندگی'] = dealer_name
-                bdc_row['عنوان شغل'] = _filter_positions(bdc_row.get('عنوان شغل', ''), 'دیزل')
-                bdc_row['شغل موازی (ارتقا)'] = _filter_positions(bdc_row.get('شغل موازی (ارتقا)', ''), 'دیزل')
+        return results
 
-                smc_row = row.copy()
-                smc_row['company'] = 'smc'
-                smc_row['عنوان نمایندگی'] = self.bdc_to_smc_map[dealer_code]
-                smc_row['عنوان شغل'] = _filter_positions(smc_row.get('عنوان شغل', ''), 'سیبا')
-                smc_row['شغل موازی (ارتقا)'] = _filter_positions(smc_row.get('شغل موازی (ارتقا)', ''), 'سیبا')
 
-                new_rows.extend([bdc_row, smc_row])
+    def apply_dual_dealer_logic(self):
+        """
+        Splits BDC personnel of dealers listed in bdc_to_smc.csv between the
+        BDC dealer and its SMC counterpart, based on the positions they hold:
+        - only 'دیزل' positions: row stays BDC
+        - only 'سیبا' positions: row moves to the SMC dealer
+        - both: a BDC row with the 'دیزل' positions followed by an SMC row
+          with the 'سیبا' positions
+        - neither: the BDC row is kept and an SMC copy is added in which
+          mechanic positions become 'مکانیک سیبا موتور'
+        Rows keep their original order and index labels; split rows repeat
+        their label.
+        """
+        if 'company' not in self.raw.columns or 'عنوان نمایندگی' not in self.raw.columns:
+            return
 
-            else:
-                            # Keep original BDC row
-                            bdc_row = row.copy()
-                            bdc_row['company'] = 'bdc'
-                            bdc_row['عنوان نمایندگی'] = dealer_name
-                            new_rows.append(bdc_row)
-                            
-                            # Create corresponding SMC row
-                            smc_row = row.copy()
-                            smc_row['company'] = 'smc'
-                            smc_row['عنوان نمایندگی'] = self.bdc_to_smc_map[dealer_code]
-
-                            # Instead of appending ' سیبا', ensure the raw position will map correctly
-                            # This might require explicitly setting the raw position to "مکانیک سیبا موتور"
-                            # if the original was "مکانیک" and it's for an SMC dealer.
-                            # A more robust solution might involve a lookup function here.
-
-                            # Example of a more direct (but perhaps overly simplified) fix:
-                            if pd.notna(smc_row.get('عنوان شغل')):
-                                original_pos = smc_row['عنوان شغل'].strip()
-                                if original_pos == 'مکانیک کار': # Assuming this is the mapped name from BDC
-                                    smc_row['عنوان شغل'] = 'مکانیک سیبا موتور' # Set it to the raw name that will map correctly
-                                # You'd need similar logic for 'شغل موازی (ارتقا)'
-
-                            # A better approach would be to have a reverse mapping or more sophisticated logic
-                            # For now, let's remove the problematic appending logic for demonstration purposes
-                            # and assume the raw data will be correct or a better mapping is in place.
-                            # If the goal is for SMC to have 'مکانیک سیبا موتور' as its raw title, then:
-                            if pd.notna(smc_row.get('عنوان شغل')) and 'مکانیک' in smc_row['عنوان شغل']:
-                                smc_row['عنوان شغل'] = 'مکانیک سیبا موتور'
-                            if pd.notna(smc_row.get('شغل موازی (ارتقا)')):
-                                alt_pos_parts = []
-                                for p in smc_row['شغل موازی (ارتقا)'].split('&&&'):
-                                    if 'مکانیک' in p.strip():
-                                        alt_pos_parts.append('مکانیک سیبا موتور')
-                                    else:
-                                        alt_pos_parts.append(p.strip())
-                                smc_row['شغل موازی (ارتقا)'] = '&&&'.join(alt_pos_parts)
-
-                            new_rows.append(smc_row)
-
-
-
-
-
-        self.raw = pd.DataFrame(new_rows)
+        raw = self.raw.reset_index(drop=True)
+        main_col, alt_col = 'عنوان شغل', 'شغل موازی (ارتقا)'
+
+        dealer_code = raw['عنوان نمایندگی'].astype(str).str.split(" ").str[0]
+        is_dual = (raw['company'] == 'bdc') & dealer_code.isin(self.bdc_to_smc_map.keys())
+
+        main_pos = raw[main_col].astype(object)
+        alt_pos = raw[alt_col].astype(object)
+        diesel_present = _contains(main_pos, 'دیزل') | _contains(alt_pos, 'دیزل')
+        siba_present = _contains(main_pos, 'سیبا') | _contains(alt_pos, 'سیبا')
+
+        both = is_dual & diesel_present & siba_present
+        neither = is_dual & ~diesel_present & ~siba_present
+        siba_only = is_dual & siba_present & ~diesel_present
+
+        # BDC side: every row except those that move entirely to SMC
+        bdc_rows = raw[~siba_only].copy()
+        bdc_both = both[~siba_only]
+        for col, positions in ((main_col, main_pos), (alt_col, alt_pos)):
+            bdc_rows[col] = positions[~siba_only]
+            bdc_rows.loc[bdc_both, col] = _filter_positions(positions[both], 'دیزل')
+
+        # SMC side: a moved or added row for every dual-dealer row that has any SMC positions
+        smc_mask = siba_only | both | neither
+        smc_rows = raw[smc_mask].copy()
+        smc_rows['company'] = 'smc'
+        smc_rows['عنوان نمایندگی'] = dealer_code[smc_mask].map(self.bdc_to_smc_map)
+        for col, positions in ((main_col, main_pos), (alt_col, alt_pos)):
+            smc_rows[col] = positions[smc_mask]
+            smc_rows.loc[both[smc_mask], col] = _filter_positions(positions[both], 'سیبا')
+
+        mechanic_main = main_pos[neither]
+        smc_rows.loc[neither[smc_mask], main_col] = mechanic_main.mask(
+            _contains(mechanic_main, 'مکانیک'), 'مکانیک سیبا موتور')
+        smc_rows.loc[neither[smc_mask], alt_col] = _rewrite_mechanic_positions(alt_pos[neither])
+
+        # Interleave: each original row's BDC part comes before its SMC part
+        combined = pd.concat([bdc_rows, smc_rows])
+        order = np.lexsort((
+            np.r_[np.zeros(len(bdc_rows), dtype=int), np.ones(len(smc_rows), dtype=int)],
+            combined.index.to_numpy(),
+        ))
+        combined = combined.iloc[order]
+        combined.index = self.raw.index[combined.index.to_numpy()]
+
+        for col in combined.columns:
+            if isinstance(self.raw[col].dtype, CategoricalDtype):
+                combined[col] = combined[col].astype('category')
+        self.raw = combined
 
     def get_original_dealer_name(self, current_dealer_name):
         """
@@ -219,7 +538,7 @@ class DataManager:
         For other dealers, looks up categories from dealers.xlsx
         """
         # Check if this is an SMC dealer by looking at the company in raw data
-        dealer_personnel = self.raw[self.raw['عنوان نمایندگی'] == dealer_name]
+        dealer_personnel = self.get_personnel_for_dealer(dealer_name)
         if not dealer_personnel.empty:
             company = dealer_personnel.iloc[0].get('company', '')
             if company == 'smc':
@@ -248,4 +567,5 @@ class DataManager:
 
     def get_personnel_for_dealer(self, dealer_name):
         """Retrieves all personnel records for a given dealer."""
-        return self.raw[self.raw['عنوان نمایندگی'] == dealer_name]
\ No newline at end of file
+        positions = self._get_dealer_rows().get(dealer_name, [])
+        return self.raw.iloc[positions]
\ No newline at end of file
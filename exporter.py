@@ -1,69 +1,359 @@
 # exporter.py
+import gzip
+import hashlib
+import io
+import json
+import os
+import re
+import tempfile
+from contextlib import contextmanager
+
 import pandas as pd
-from openpyxl.styles import PatternFill
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
 from openpyxl.formatting.rule import Rule, CellIsRule
 from openpyxl.utils import get_column_letter
 
-def _format_worksheet(worksheet):
-    """Applies conditional formatting and adjusts column widths for a worksheet."""
-    # (This is your original format_worksheet function, moved here)
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+# 'openpyxl' builds each workbook in memory through pd.ExcelWriter; 'write_only'
+# streams rows to disk with openpyxl's write-only mode in constant memory.
+WRITER_BACKENDS = ('openpyxl', 'write_only')
+
+STATUS_COLUMN = 'گذرانده شده'
+# Upper bound for auto-fitted column widths, so very long course names stay readable
+MAX_COLUMN_WIDTH = 60
+
+# Column order of flat (CSV / Parquet) exports; kept stable for downstream BI ingestion
+EXPORT_COLUMNS = ['نمایندگی', 'نام پرسنل', 'سمت', 'معیار', 'دسته', 'خودرو', 'گذرانده شده', 'دلیل']
+FLAT_COMPRESSIONS = (None, 'gzip', 'zstd')
+
+# Per-dealer directory exports: bump when the workbook layout changes so every file is rewritten
+EXPORT_FORMAT_VERSION = 1
+EXPORT_MANIFEST_NAME = 'manifest.json'
+
+
+def _dealer_filename(dealer_name):
+    """Workbook file name for a dealer in a per-dealer export directory."""
+    safe_name = re.sub(r'[<>:"/\\|?*]', '_', dealer_name).strip()
+    return f"{safe_name}_training_status.xlsx"
+
+
+def _frame_hash(df):
+    """SHA-256 of an export DataFrame's column names and values."""
+    sha = hashlib.sha256()
+    sha.update(json.dumps([str(col) for col in df.columns], ensure_ascii=False).encode('utf-8'))
+    sha.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return sha.hexdigest()
+
+
+class ExportCancelled(Exception):
+    """Raised when an export is cancelled; the partial output is discarded."""
+
+
+def _output_mode(filename):
+    """Permission bits for an export: those of the file it replaces, else 0666 minus the umask."""
+    try:
+        return os.stat(filename).st_mode & 0o777
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+
+@contextmanager
+def _atomic_output(filename):
+    """
+    Yields a temporary path next to filename (same extension) for an export
+    to write; it replaces filename only when the block completes, and is
+    removed if the export fails or is cancelled.
+    """
+    directory, basename = os.path.split(os.path.abspath(filename))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".~{basename}.", suffix=os.path.splitext(basename)[1])
+    os.close(fd)
+    try:
+        yield tmp_path
+        # mkstemp creates the file as 0600; give it the permissions a plain open() would
+        os.chmod(tmp_path, _output_mode(filename))
+        os.replace(tmp_path, filename)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _flat_format(filename):
+    """Infers (file format, compression) of a flat export from its file name."""
+    name = filename.lower()
+    if name.endswith('.parquet'):
+        return 'parquet', None
+    if name.endswith('.gz'):
+        return 'csv', 'gzip'
+    if name.endswith('.zst'):
+        return 'csv', 'zstd'
+    return 'csv', None
+
+
+def _open_csv(filename, compression):
+    """Opens a text stream for a CSV export, optionally gzip or zstd compressed."""
+    if compression == 'gzip':
+        return gzip.open(filename, 'wt', encoding='utf-8', newline='')
+    if compression == 'zstd':
+        raw = open(filename, 'wb')
+        return io.TextIOWrapper(zstandard.ZstdCompressor().stream_writer(raw), encoding='utf-8', newline='')
+    return open(filename, 'w', encoding='utf-8', newline='')
+
+
+def _sheet_name(dealer_name):
+    """Worksheet name for a dealer (Excel limits sheet names to 31 characters)."""
+    return dealer_name.split(' - ')[-1][:30] if ' - ' in dealer_name else dealer_name[:30]
+
+
+def _add_status_rules(worksheet, status_col_letter, last_row):
+    """Adds the green/red conditional formatting of the pass-status column as range rules."""
     green_fill = PatternFill(start_color='C6EFCE', end_color='C6EFCE', fill_type='solid')
     red_fill = PatternFill(start_color='FFC7CE', end_color='FFC7CE', fill_type='solid')
-    
-    # Find the 'گذرانده شده' column
-    header = [cell.value for cell in worksheet[1]]
-    try:
-        status_col_letter = get_column_letter(header.index('گذرانده شده') + 1)
-    except ValueError:
-        return # Column not found, can't format
 
-    # Add formatting rules
     worksheet.conditional_formatting.add(
-        f'{status_col_letter}2:{status_col_letter}{worksheet.max_row}',
+        f'{status_col_letter}2:{status_col_letter}{last_row}',
         CellIsRule(operator='equal', formula=['"بله"'], fill=green_fill)
     )
     worksheet.conditional_formatting.add(
-        f'{status_col_letter}2:{status_col_letter}{worksheet.max_row}',
+        f'{status_col_letter}2:{status_col_letter}{last_row}',
         CellIsRule(operator='equal', formula=['"خیر"'], fill=red_fill)
     )
 
-    # Auto-adjust column widths
-    for col in worksheet.columns:
-        max_length = 0
-        column = col[0].column_letter
-        for cell in col:
-            try:
-                if len(str(cell.value)) > max_length:
-                    max_length = len(cell.value)
-            except:
-                pass
-        adjusted_width = (max_length + 2)
-        worksheet.column_dimensions[column].width = adjusted_width
+
+def _format_plan(df):
+    """
+    Plans a sheet's formatting from the DataFrame about to be written:
+    {'status_column': letter, 'last_row': n, 'widths': {letter: width}}, or
+    None when there is no 'گذرانده شده' column to format. Widths are the
+    longest text in each column (header included) + 2, capped at MAX_COLUMN_WIDTH.
+    """
+    columns = [str(col) for col in df.columns]
+    if STATUS_COLUMN not in columns:
+        return None
+
+    widths = {}
+    for idx, header in enumerate(columns):
+        values = df.iloc[:, idx].dropna()
+        longest = values.astype(str).str.len().max() if len(values) else 0
+        widths[get_column_letter(idx + 1)] = min(max(int(longest), len(header)) + 2, MAX_COLUMN_WIDTH)
+
+    return {
+        'status_column': get_column_letter(columns.index(STATUS_COLUMN) + 1),
+        'last_row': len(df) + 1,
+        'widths': widths,
+    }
+
+
+def _format_worksheet(worksheet, plan):
+    """Applies a _format_plan (conditional formatting and column widths) to a worksheet."""
+    if plan is None:
+        return # Column not found, can't format
+
+    _add_status_rules(worksheet, plan['status_column'], plan['last_row'])
+    for column, width in plan['widths'].items():
+        worksheet.column_dimensions[column].width = width
+
+
+def _header_cell(worksheet, value):
+    """A header cell styled the way pd.DataFrame.to_excel styles its header row."""
+    cell = WriteOnlyCell(worksheet, value=value)
+    cell.font = Font(bold=True)
+    side = Side(style='thin')
+    cell.border = Border(left=side, right=side, top=side, bottom=side)
+    cell.alignment = Alignment(horizontal='center', vertical='top')
+    return cell
+
+
+def _write_sheets_openpyxl(filename, sheets):
+    """Writes (sheet name, DataFrame) pairs through pd.ExcelWriter, formatting each sheet from its DataFrame."""
+    with pd.ExcelWriter(filename, engine='openpyxl') as writer:
+        for sheet_name, df in sheets:
+            df.to_excel(writer, sheet_name=sheet_name, index=False)
+            worksheet = writer.sheets[sheet_name]
+            _format_worksheet(worksheet, _format_plan(df))
+
+
+def _write_sheets_write_only(filename, sheets):
+    """
+    Writes (sheet name, DataFrame) pairs with a write-only openpyxl workbook.
+    Widths and conditional formatting are planned from each DataFrame before
+    its rows are streamed out, so memory does not grow with the total rows.
+    """
+    workbook = Workbook(write_only=True)
+    try:
+        for sheet_name, df in sheets:
+            worksheet = workbook.create_sheet(title=sheet_name)
+            if len(df.columns) == 0:
+                continue
+
+            _format_worksheet(worksheet, _format_plan(df))
+            worksheet.append([_header_cell(worksheet, str(col)) for col in df.columns])
+            for row in df.astype(object).where(df.notna(), None).itertuples(index=False, name=None):
+                worksheet.append(row)
+    except BaseException:
+        # Close the sheets' streams so an abandoned (e.g. cancelled) workbook is dropped quietly
+        for worksheet in workbook.worksheets:
+            worksheet.close()
+        raise
+    workbook.save(filename)
 
 
 class Exporter:
     """Handles exporting data to formatted Excel files."""
 
-    def __init__(self, training_analyzer):
+    def __init__(self, training_analyzer, backend='openpyxl'):
+        if backend not in WRITER_BACKENDS:
+            raise ValueError(f"Unknown writer backend '{backend}', expected one of {WRITER_BACKENDS}")
         self.analyzer = training_analyzer
+        # Writer used for workbooks, see WRITER_BACKENDS
+        self.backend = backend
 
-    def export_single_dealer(self, dealer_name, filename):
-        """Exports a single dealer's training analysis to an Excel file."""
-        df = self.analyzer.generate_dealer_export_df(dealer_name)
-        
-        with pd.ExcelWriter(filename, engine='openpyxl') as writer:
-            sheet_name = dealer_name.split(' - ')[-1][:30] if ' - ' in dealer_name else dealer_name[:30]
-            df.to_excel(writer, sheet_name=sheet_name, index=False)
-            worksheet = writer.sheets[sheet_name]
-            _format_worksheet(worksheet)
+    def _write_sheets(self, filename, sheets):
+        """Writes (sheet name, DataFrame) pairs to filename with the selected backend."""
+        if self.backend == 'write_only':
+            _write_sheets_write_only(filename, sheets)
+        else:
+            _write_sheets_openpyxl(filename, sheets)
+
+    def export_single_dealer(self, dealer_name, filename, df=None, progress_callback=None, should_cancel=None):
+        """
+        Exports a single dealer's training analysis to an Excel file.
+        df is the dealer's export DataFrame when the caller already has it.
+        """
+        if should_cancel and should_cancel():
+            raise ExportCancelled()
+        if df is None:
+            df = self.analyzer.generate_dealer_export_df(dealer_name)
+        with _atomic_output(filename) as tmp_path:
+            self._write_sheets(tmp_path, [(_sheet_name(dealer_name), df)])
+        if progress_callback:
+            progress_callback(1, 1, len(df))
+
+    def _read_export_manifest(self, manifest_path):
+        """Returns the {dealer name: entry} map of a per-dealer export manifest ({} if missing or stale)."""
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if manifest.get('version') != EXPORT_FORMAT_VERSION:
+            return {}
+        return manifest.get('dealers', {})
+
+    def export_dealers_to_directory(self, dealer_names, directory, progress_callback=None, should_cancel=None):
+        """
+        Exports one workbook per dealer into directory. A manifest records the
+        content hash of each dealer's export DataFrame, and a rerun only
+        rewrites dealers whose data changed (or whose file is missing).
+        Returns the names of the dealers whose workbook was written.
+        """
+        os.makedirs(directory, exist_ok=True)
+        manifest_path = os.path.join(directory, EXPORT_MANIFEST_NAME)
+        entries = self._read_export_manifest(manifest_path)
+
+        written = []
+        try:
+            for dealer_name, df in self._tracked_frames(dealer_names, progress_callback, should_cancel):
+                entry = {'file': _dealer_filename(dealer_name), 'hash': _frame_hash(df)}
+                filename = os.path.join(directory, entry['file'])
+                if entries.get(dealer_name) == entry and os.path.exists(filename):
+                    continue
+
+                self.export_single_dealer(dealer_name, filename, df=df)
+                entries[dealer_name] = entry
+                written.append(dealer_name)
+        finally:
+            # Record whatever was written, also when the export is cancelled part-way
+            with _atomic_output(manifest_path) as tmp_path:
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump({'version': EXPORT_FORMAT_VERSION, 'dealers': entries}, f, ensure_ascii=False, indent=2)
 
-    def export_all_dealers(self, dealer_names, filename):
+        print(f"📁 Exported {len(written)} dealer workbook(s) to {directory}, "
+              f"{len(dealer_names) - len(written)} unchanged")
+        return written
+
+    def _iter_export_frames(self, dealer_names):
+        """
+        Yields (dealer name, export DataFrame) in dealer_names order. Each
+        frame is a slice of the analyzer's batch analysis, computed once.
+        """
+        for dealer_name in dealer_names:
+            yield dealer_name, self.analyzer.generate_dealer_export_df(dealer_name)
+
+    def _tracked_frames(self, dealer_names, progress_callback=None, should_cancel=None):
+        """
+        _iter_export_frames with cancellation and progress: should_cancel() is
+        checked before each dealer (raising ExportCancelled), and once the
+        caller is done with a frame progress_callback(dealers done, total,
+        rows written) is called.
+        """
+        dealer_names = list(dealer_names)
+        rows_written = 0
+        if should_cancel and should_cancel():
+            raise ExportCancelled()
+        for done, (dealer_name, df) in enumerate(self._iter_export_frames(dealer_names), start=1):
+            yield dealer_name, df
+            rows_written += len(df)
+            if progress_callback:
+                progress_callback(done, len(dealer_names), rows_written)
+            if should_cancel and should_cancel() and done < len(dealer_names):
+                raise ExportCancelled()
+
+    def export_all_dealers(self, dealer_names, filename, progress_callback=None, should_cancel=None):
         """Exports all dealers' training analysis to a single Excel file, each on its own sheet."""
-        with pd.ExcelWriter(filename, engine='openpyxl') as writer:
-            for dealer_name in dealer_names:
-                df = self.analyzer.generate_dealer_export_df(dealer_name)
-                sheet_name = dealer_name.split(' - ')[-1][:30] if ' - ' in dealer_name else dealer_name[:30]
-                
-                df.to_excel(writer, sheet_name=sheet_name, index=False)
-                worksheet = writer.sheets[sheet_name]
-                _format_worksheet(worksheet)
\ No newline at end of file
+        frames = self._tracked_frames(dealer_names, progress_callback, should_cancel)
+        with _atomic_output(filename) as tmp_path:
+            self._write_sheets(tmp_path, ((_sheet_name(dealer_name), df) for dealer_name, df in frames))
+
+    def export_all_dealers_flat(self, dealer_names, filename, file_format=None, compression=None,
+                                progress_callback=None, should_cancel=None):
+        """
+        Streams every dealer's export rows into one CSV or Parquet file with
+        the EXPORT_COLUMNS schema, one dealer at a time, so memory stays
+        bounded by the largest dealer. file_format ('csv' or 'parquet') and
+        compression (None, 'gzip' or 'zstd') default to what the file name
+        suggests (.parquet, .csv.gz, .csv.zst).
+        """
+        inferred_format, inferred_compression = _flat_format(filename)
+        file_format = file_format or inferred_format
+        compression = compression if compression is not None else inferred_compression
+        if file_format not in ('csv', 'parquet'):
+            raise ValueError(f"Unknown flat export format '{file_format}', expected 'csv' or 'parquet'")
+        if compression not in FLAT_COMPRESSIONS:
+            raise ValueError(f"Unknown compression '{compression}', expected one of {FLAT_COMPRESSIONS}")
+
+        if file_format == 'parquet' and not PARQUET_AVAILABLE:
+            raise ValueError("Parquet export requires the 'pyarrow' package")
+        if compression == 'zstd' and file_format == 'csv' and not ZSTD_AVAILABLE:
+            raise ValueError("zstd compression requires the 'zstandard' package")
+
+        frames = (df.reindex(columns=EXPORT_COLUMNS)
+                  for _, df in self._tracked_frames(dealer_names, progress_callback, should_cancel))
+
+        with _atomic_output(filename) as tmp_path:
+            if file_format == 'parquet':
+                schema = pa.schema([(col, pa.string()) for col in EXPORT_COLUMNS])
+                with pq.ParquetWriter(tmp_path, schema, compression=compression or 'snappy') as writer:
+                    for df in frames:
+                        if not df.empty:
+                            writer.write_table(pa.Table.from_pandas(df, schema=schema, preserve_index=False))
+            else:
+                with _open_csv(tmp_path, compression) as f:
+                    pd.DataFrame(columns=EXPORT_COLUMNS).to_csv(f, index=False)
+                    for df in frames:
+                        df.to_csv(f, header=False, index=False)
@@ -1,4 +1,5 @@
 import sys
+import multiprocessing
 from PyQt5.QtWidgets import QApplication
 from main_window import MainWindow
 
@@ -14,4 +15,5 @@ def main():
     sys.exit(app.exec_())
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # process pools in the frozen (PyInstaller) build
     main()
\ No newline at end of file
@@ -1,19 +1,73 @@
 # main_window.py
 from PyQt5.QtWidgets import (
-    QMainWindow, QSplitter, QListWidget, QVBoxLayout, QWidget,
-    QLabel, QScrollArea, QListWidgetItem, QFileDialog, QDialog
+    QMainWindow, QSplitter, QListView, QVBoxLayout, QWidget,
+    QLabel, QScrollArea, QLineEdit, QFileDialog, QDialog,
+    QProgressDialog, QMessageBox
 )
-from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QColor
+from PyQt5.QtCore import Qt, QThread, QTimer, QSortFilterProxyModel, QStringListModel, pyqtSignal
 
 from data_manager import DataManager
 from training_analyzer import TrainingAnalyzer
 from ui_formatter import UIFormatter
 from exporter import Exporter
+from ExportWorker import ExportWorker
+from SummaryPrefetcher import SummaryPrefetcher
+from PersonnelAnalysisWorker import PersonnelAnalysisWorker
+from PersonnelListModel import PersonnelListModel, FILTER_ROLE
 from NormalizerDialog import NormalizerDialog
-import pandas as pd
 # ui_formatter.py
 from collections import defaultdict
+from functools import lru_cache
+
+
+# Status bar text shown once each loading stage has finished
+LOAD_STAGE_MESSAGES = {
+    'parsed': "Workbooks parsed and sanitized, applying mappings...",
+    'mappings': "Mappings applied, building indexes...",
+    'indexes': "Indexes built, analyzing training status...",
+    'ready': "Ready",
+}
+
+# Quiet time after the last personnel selection change before it is analyzed
+PERSONNEL_DEBOUNCE_MS = 150
+
+
+class DataLoader(QThread):
+    """Background thread that loads all data, reporting each finished stage"""
+    stage_changed = pyqtSignal(str)  # a key of LOAD_STAGE_MESSAGES
+    rows_loaded = pyqtSignal(int)  # raw rows processed while raw.xlsx is streamed
+    dealers_ready = pyqtSignal(list)
+    load_finished = pyqtSignal()
+    load_failed = pyqtSignal(str)
+
+    def __init__(self, data_manager, analyzer, force_reload=False):
+        super().__init__()
+        self.data_manager = data_manager
+        self.analyzer = analyzer
+        self.force_reload = force_reload
+
+    def _on_stage(self, stage):
+        self.stage_changed.emit(stage)
+        if stage == 'mappings':
+            # Dealer names are final once the dual-dealer split has run
+            self.dealers_ready.emit(self.data_manager.get_all_dealer_names())
+
+    def run(self):
+        try:
+            self.data_manager.load_all_data(
+                force_reload=self.force_reload,
+                progress_callback=self.rows_loaded.emit,
+                stage_callback=self._on_stage,
+            )
+            self.data_manager.build_indexes()
+            self.stage_changed.emit('indexes')
+            self.analyzer.analyze_all()
+            self.stage_changed.emit('ready')
+        except Exception as e:
+            print(f"Error loading data: {e}")
+            self.load_failed.emit(str(e))
+        else:
+            self.load_finished.emit()
 
 
 class MainWindow(QMainWindow):
@@ -25,7 +79,24 @@ class MainWindow(QMainWindow):
         # Initialize helper classes
         self.data_manager = DataManager()
         self.analyzer = TrainingAnalyzer(self.data_manager)
-        self.exporter = Exporter(self.analyzer)
+        self.exporter = Exporter(self.analyzer, backend='write_only')
+        self._export_worker = None
+        self._data_loader = None
+        self._prefetcher = None
+        self._pending_dealer = None  # selected dealer waiting for the prefetcher
+
+        # Personnel details are analyzed off the UI thread once the selection
+        # settles; only the result for the latest request id is shown
+        self._personnel_request_id = 0
+        self._personnel_timer = QTimer(self, singleShot=True, interval=PERSONNEL_DEBOUNCE_MS)
+        self._personnel_timer.timeout.connect(self._analyze_selected_personnel)
+        self._personnel_worker = PersonnelAnalysisWorker(self.analyzer)
+        self._personnel_worker.analysis_ready.connect(self._on_personnel_analyzed)
+        self._personnel_worker.analysis_failed.connect(self._on_personnel_analysis_failed)
+        self._personnel_worker.start()
+
+        # Rendered dealer panels keyed by (dealer name, data_version), see dealer_cache_info()
+        self._dealer_html_cache = lru_cache(maxsize=256)(self._render_dealer_details)
 
         self.init_ui()
         self.load_initial_data()
@@ -38,12 +109,14 @@ class MainWindow(QMainWindow):
         splitter = QSplitter(Qt.Horizontal)
         main_layout.addWidget(splitter)
 
-        # Left Panel (Lists)
+        # Left Panel (Lists): models filtered by the line edit above each view
         left_panel = QSplitter(Qt.Vertical)
-        self.dealer_list_widget = QListWidget()
-        self.personnel_list_widget = QListWidget()
-        left_panel.addWidget(self.dealer_list_widget)
-        left_panel.addWidget(self.personnel_list_widget)
+        self.dealer_model = QStringListModel(self)
+        self.personnel_model = PersonnelListModel(self)
+        self.dealer_list_view, self.dealer_filter_edit = self._create_filtered_list(
+            left_panel, self.dealer_model, Qt.DisplayRole, "Filter dealers...")
+        self.personnel_list_view, self.personnel_filter_edit = self._create_filtered_list(
+            left_panel, self.personnel_model, FILTER_ROLE, "Filter by name, code or position...")
 
         # Right Panel (Details)
         right_panel = QSplitter(Qt.Vertical)
@@ -65,111 +138,202 @@ class MainWindow(QMainWindow):
         splitter.setSizes([300, 900])
 
         # Connections
-        self.dealer_list_widget.currentItemChanged.connect(self._on_dealer_selected)
-        self.personnel_list_widget.currentItemChanged.connect(self._on_personnel_selected)
+        self.dealer_list_view.selectionModel().currentChanged.connect(self._on_dealer_selected)
+        self.personnel_list_view.selectionModel().currentChanged.connect(self._on_personnel_selected)
 
         # Menubar
         menubar = self.menuBar()
         settings_menu = menubar.addMenu('Settings')
         export_menu = menubar.addMenu('Export')
         
-        settings_menu.addAction('Data Normalization', self._open_normalizer)
-        export_menu.addAction('Export Current Dealer', self._export_current_dealer)
-        export_menu.addAction('Export All Dealers', self._export_all_dealers)
+        # Actions that need fully loaded data; disabled while a load is running
+        self._normalizer_action = settings_menu.addAction('Data Normalization', self._open_normalizer)
+        self._rebuild_cache_action = settings_menu.addAction('Rebuild Data Cache', self._rebuild_data_cache)
+        # Actions that reload the data; also disabled while an export runs
+        self._reload_actions = [self._normalizer_action, self._rebuild_cache_action]
+        self._data_actions = self._reload_actions + [
+            export_menu.addAction('Export Current Dealer', self._export_current_dealer),
+            export_menu.addAction('Export All Dealers', self._export_all_dealers),
+            export_menu.addAction('Export Dealers to Folder', self._export_dealers_to_folder),
+            export_menu.addAction('Export All Dealers (CSV / Parquet)', self._export_all_dealers_flat),
+        ]
+
+    def _create_filtered_list(self, parent, model, filter_role, placeholder):
+        """Adds a filter line edit above a uniform-height list view of model to parent."""
+        proxy = QSortFilterProxyModel(self)
+        proxy.setSourceModel(model)
+        proxy.setFilterRole(filter_role)
+        proxy.setFilterCaseSensitivity(Qt.CaseInsensitive)
+
+        filter_edit = QLineEdit(placeholderText=placeholder, clearButtonEnabled=True)
+        filter_edit.textChanged.connect(proxy.setFilterFixedString)
+        view = QListView(uniformItemSizes=True)
+        view.setModel(proxy)
+
+        container = QWidget()
+        layout = QVBoxLayout(container)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(filter_edit)
+        layout.addWidget(view)
+        parent.addWidget(container)
+        return view, filter_edit
+
+    def load_initial_data(self, force_reload=False):
+        """
+        Loads all data in a background thread. The dealer list fills as soon
+        as dealer names are known; dealer selection and the data actions are
+        enabled once loading has finished.
+        """
+        if self._data_loader is not None and self._data_loader.isRunning():
+            return
+        if self._export_worker is not None and self._export_worker.isRunning():
+            QMessageBox.information(self, "Load Data", "Wait for the running export to finish before reloading.")
+            return
 
-    def load_initial_data(self):
-        """Loads all data and populates the main dealer list."""
-        self.data_manager.load_all_data()
-        self.dealer_list_widget.clear()
-        dealer_names = self.data_manager.get_all_dealer_names()
-        self.dealer_list_widget.addItems(dealer_names)
+        # Nothing may read the analyzer while the loader replaces the data
+        self._stop_prefetch()
+        self._clear_personnel_details()
+        self._personnel_worker.drain()
+
+        self._set_data_ready(False)
+        self.dealer_model.setStringList([])
+        self.personnel_model.clear()
+        self.dealer_details_label.clear()
+        self.statusBar().showMessage("Loading workbooks...")
+
+        loader = DataLoader(self.data_manager, self.analyzer, force_reload)
+        loader.stage_changed.connect(lambda stage: self.statusBar().showMessage(LOAD_STAGE_MESSAGES[stage]))
+        loader.rows_loaded.connect(lambda rows: self.statusBar().showMessage(f"Loading workbooks... {rows} raw rows"))
+        loader.dealers_ready.connect(self.dealer_model.setStringList)
+        loader.load_finished.connect(lambda: self._set_data_ready(True))
+        loader.load_finished.connect(self._start_prefetch)
+        loader.load_failed.connect(self._on_load_failed)
+        self._data_loader = loader
+        loader.start()
+
+    def _set_data_ready(self, ready):
+        """Enables or disables everything that depends on fully loaded data."""
+        for widget in (self.dealer_list_view, self.dealer_filter_edit,
+                       self.personnel_list_view, self.personnel_filter_edit):
+            widget.setEnabled(ready)
+        for action in self._data_actions:
+            action.setEnabled(ready)
+
+    def _start_prefetch(self):
+        """Warms the dealer panel cache for every dealer at low priority."""
+        prefetcher = SummaryPrefetcher(self._warm_dealer, self.data_manager.get_all_dealer_names())
+        prefetcher.dealer_warmed.connect(self._on_dealer_warmed)
+        self._prefetcher = prefetcher
+        prefetcher.start(QThread.LowestPriority)
+
+    def _stop_prefetch(self):
+        """Cancels a running prefetch and waits for the dealer in progress."""
+        self._pending_dealer = None
+        if self._prefetcher is not None:
+            self._prefetcher.requestInterruption()
+            self._prefetcher.wait()
+            self._prefetcher = None
+
+    def _warm_dealer(self, dealer_name):
+        """Prefetcher callback; fills the summary and rendered-panel caches for one dealer."""
+        self._dealer_html_cache(dealer_name, self.data_manager.data_version)
+
+    def _on_dealer_warmed(self, dealer_name):
+        """Shows the panel of a selected dealer once the prefetcher has analyzed it."""
+        if dealer_name == self._pending_dealer:
+            self._pending_dealer = None
+            self._update_dealer_details_panel(dealer_name)
+
+    def _on_load_failed(self, error):
+        """Slot for a failed background load; keeps Rebuild Data Cache available to retry."""
+        self.statusBar().showMessage("Loading failed")
+        self._rebuild_cache_action.setEnabled(True)
+        QMessageBox.critical(self, "Load Failed", error)
 
 
     def _on_dealer_selected(self, current, previous):
         """Slot for when a dealer is selected from the list."""
-        if not current:
+        if not current.isValid():
             return
 
-        dealer_name = current.text()
-        
-        
-        # Generate the new summary data
-        summary_data = self.analyzer.generate_dealer_personnel_summary(dealer_name)
-        
-        self._update_dealer_details_panel(dealer_name, summary_data)
+        dealer_name = current.data()
+        if self._prefetcher is not None and self._prefetcher.prioritize(dealer_name):
+            # Not analyzed yet; the prefetcher does it next and the panel follows
+            self._pending_dealer = dealer_name
+            self.dealer_details_label.setText(f"<h3>{dealer_name}</h3><p>Analyzing...</p>")
+        else:
+            self._pending_dealer = None
+            self._update_dealer_details_panel(dealer_name)
         self._populate_personnel_list(dealer_name)
-        self.personnel_details_label.clear()
+        self._clear_personnel_details()
 
+    def _on_personnel_selected(self, current, previous):
+        """
+        Slot for when a person is selected from the list. The analysis is
+        debounced, so holding an arrow key only analyzes the row it stops on.
+        """
+        if not current.isValid() or not (current.flags() & Qt.ItemIsSelectable):
+            self._clear_personnel_details()
+            return
 
+        # Results still in flight for the previous row are now stale
+        self._personnel_request_id += 1
+        self._personnel_timer.start()
 
-    def _on_personnel_selected(self, current, previous):
-        """Slot for when a person is selected from the list."""
-        if not current or not (current.flags() & Qt.ItemIsSelectable):
-            self.personnel_details_label.clear()
+    def _clear_personnel_details(self):
+        """Clears the personnel panel and drops any pending or in-flight analysis."""
+        self._personnel_request_id += 1
+        self._personnel_timer.stop()
+        self.personnel_details_label.clear()
+
+    def _analyze_selected_personnel(self):
+        """Debounce timer slot; hands the current selection to the analysis worker."""
+        current = self.personnel_list_view.currentIndex()
+        if not current.isValid() or not (current.flags() & Qt.ItemIsSelectable):
             return
 
         item_data = current.data(Qt.UserRole)
-        pcode = item_data['pcode']
-        position = item_data['position']
-        dealer_name = item_data['dealer_name']
+        self._personnel_worker.submit(
+            self._personnel_request_id,
+            item_data['pcode'],
+            item_data['dealer_name'],
+            item_data['position'],
+        )
+
+    def _on_personnel_analyzed(self, request_id, html_content):
+        """Shows a finished analysis unless the selection has moved on since."""
+        if request_id == self._personnel_request_id:
+            self.personnel_details_label.setText(html_content)
 
-        analysis_result = self.analyzer.analyze_personnel_training(pcode, dealer_name, position)
-        html_content = UIFormatter.format_personnel_details_html(analysis_result)
-        self.personnel_details_label.setText(html_content)
+    def _on_personnel_analysis_failed(self, request_id, error):
+        if request_id == self._personnel_request_id:
+            self.personnel_details_label.setText(f"<p style='color: red;'>Analysis failed: {error}</p>")
 
-    def _update_dealer_details_panel(self, dealer_name, summary_data):
+    def _update_dealer_details_panel(self, dealer_name):
         """Updates the top-right panel with dealer info and summary table."""
-        categories = self.data_manager.get_dealer_categories(dealer_name)
-        # Pass the summary_data to the formatter
-        html = UIFormatter.format_dealer_details_html(dealer_name, categories, summary_data)
+        html = self._dealer_html_cache(dealer_name, self.data_manager.data_version)
         self.dealer_details_label.setText(html)
 
+    def _render_dealer_details(self, dealer_name, data_version):
+        """Renders the dealer panel HTML for the current data (data_version keys the cache)."""
+        summary_data = self.analyzer.generate_dealer_personnel_summary(dealer_name)
+        categories = self.data_manager.get_dealer_categories(dealer_name)
+        return UIFormatter.format_dealer_details_html(dealer_name, categories, summary_data)
+
+    def dealer_cache_info(self):
+        """Hit/miss counters and sizes of the dealer summary and rendered-panel caches."""
+        return {
+            'summaries': self.analyzer.summary_cache_info(),
+            'html': self._dealer_html_cache.cache_info(),
+        }
+
 
 
     def _populate_personnel_list(self, dealer_name):
-        """Fills the personnel list based on the selected dealer."""
-        self.personnel_list_widget.clear()
-        personnel_df = self.data_manager.get_personnel_for_dealer(dealer_name)
-        dealer_code = dealer_name[:4]
-
-        # Use a set to avoid duplicate list entries for the same person/role
-        unique_personnel = set()
-
-        for _, row in personnel_df.iterrows():
-            name = row['نام و نام خانوادگی']
-            pcode = row['کد پرسنلی']
-            
-            positions = []
-            main_pos = row.get('عنوان شغل', '')
-            if pd.notna(main_pos) and main_pos.strip():
-                positions.append(main_pos.strip())
-            
-            alt_pos = row.get('شغل موازی (ارتقا)', '')
-            if pd.notna(alt_pos) and alt_pos.strip():
-                positions.extend([p.strip() for p in alt_pos.split('&&&') if p.strip()])
-            
-            if not positions:
-                positions.append('بدون سمت')
-
-            for pos in positions:
-                if (name, pos, pcode) not in unique_personnel:
-                    unique_personnel.add((name, pos, pcode))
-                    
-                    # Create the list item
-                    display_text = f"{dealer_code} | {name} | {pos} | {pcode}"
-                    item = QListWidgetItem(display_text)
-                    
-                    # Store data within the item
-                    item_data = {'pcode': pcode, 'position': pos, 'dealer_name': dealer_name}
-                    item.setData(Qt.UserRole, item_data)
-                    
-                    # Disable item if its position is not in the mapping
-                    if pos not in self.data_manager.position_mapping:
-                        item.setFlags(item.flags() & ~Qt.ItemIsSelectable)
-                        item.setForeground(QColor('gray'))
-
-                    self.personnel_list_widget.addItem(item)
-    
+        """Shows the selected dealer's person-positions in the personnel list."""
+        roles = self.analyzer.get_personnel_roles(dealer_name)
+        self.personnel_model.set_roles(roles, self.data_manager.position_mapping)
+
     def _open_normalizer(self):
         """Opens the data normalization dialog."""
         # This requires passing the raw dataframes to the dialog
@@ -183,24 +347,25 @@ class MainWindow(QMainWindow):
         if dialog.exec_() == QDialog.Accepted:
             # Reload everything if changes were saved
             self.load_initial_data()
-            self.dealer_details_label.clear()
-            self.personnel_list_widget.clear()
-            self.personnel_details_label.clear()
+
+    def _rebuild_data_cache(self):
+        """Re-parses every workbook from disk, ignoring the parsed-data cache."""
+        self.load_initial_data(force_reload=True)
 
     def _export_current_dealer(self):
         """Exports the currently selected dealer's data."""
-        current_item = self.dealer_list_widget.currentItem()
-        if not current_item:
+        current = self.dealer_list_view.currentIndex()
+        if not current.isValid():
             return
         
-        dealer_name = current_item.text()
+        dealer_name = current.data()
         dealer_title = dealer_name[5:]
         
         filename, _ = QFileDialog.getSaveFileName(
             self, "Save Current Dealer Data", f"{dealer_title}_training_status.xlsx", "Excel Files (*.xlsx)"
         )
         if filename:
-            self.exporter.export_single_dealer(dealer_name, filename)
+            self._start_export(self.exporter.export_single_dealer, dealer_name, filename)
 
     def _export_all_dealers(self):
         """Exports all dealers' data to a single Excel file."""
@@ -209,4 +374,82 @@ class MainWindow(QMainWindow):
         )
         if filename:
             all_dealers = self.data_manager.get_all_dealer_names()
-            self.exporter.export_all_dealers(all_dealers, filename)
\ No newline at end of file
+            self._start_export(self.exporter.export_all_dealers, all_dealers, filename)
+
+    def _export_dealers_to_folder(self):
+        """Exports one workbook per dealer into a folder, rewriting only dealers whose data changed."""
+        directory = QFileDialog.getExistingDirectory(self, "Select Export Folder")
+        if directory:
+            all_dealers = self.data_manager.get_all_dealer_names()
+            self._start_export(self.exporter.export_dealers_to_directory, all_dealers, directory)
+
+    def _export_all_dealers_flat(self):
+        """Exports all dealers' rows to a single CSV or Parquet file for BI tools."""
+        filename, _ = QFileDialog.getSaveFileName(
+            self, "Save All Dealers Data", "all_dealers_training_status.csv",
+            "CSV Files (*.csv);;Compressed CSV (*.csv.gz);;Parquet Files (*.parquet)"
+        )
+        if filename:
+            all_dealers = self.data_manager.get_all_dealer_names()
+            self._start_export(self.exporter.export_all_dealers_flat, all_dealers, filename)
+
+    def _start_export(self, export_method, dealers, target):
+        """Runs an Exporter method in a background thread behind a cancellable progress dialog."""
+        if self._export_worker is not None and self._export_worker.isRunning():
+            QMessageBox.information(self, "Export", "An export is already running.")
+            return
+
+        total = 1 if isinstance(dealers, str) else len(dealers)
+        progress_dialog = QProgressDialog(f"Exporting to {target}...", "Cancel", 0, total, self)
+        progress_dialog.setWindowTitle("Export")
+        progress_dialog.setMinimumDuration(0)
+        progress_dialog.setAutoClose(False)
+        progress_dialog.setAutoReset(False)
+
+        worker = ExportWorker(export_method, dealers, target)
+
+        def on_progress(done, total, rows):
+            progress_dialog.setMaximum(total)
+            progress_dialog.setValue(done)
+            progress_dialog.setLabelText(f"Exported {done}/{total} dealers ({rows} rows)")
+
+        def on_cancel():
+            progress_dialog.setLabelText("Cancelling...")
+            worker.requestInterruption()
+
+        def on_finished():
+            progress_dialog.canceled.disconnect(on_cancel)
+            progress_dialog.close()
+            self._export_worker = None
+            for action in self._reload_actions:
+                action.setEnabled(True)
+
+        worker.progress.connect(on_progress)
+        worker.export_done.connect(lambda path: self.statusBar().showMessage(f"Exported to {path}", 5000))
+        worker.export_cancelled.connect(lambda: self.statusBar().showMessage("Export cancelled", 5000))
+        worker.export_failed.connect(lambda error: QMessageBox.critical(self, "Export Failed", error))
+        worker.finished.connect(on_finished)
+        progress_dialog.canceled.connect(on_cancel)
+
+        # A reload would be refused mid-export (see load_initial_data), e.g. after saving in the normalizer
+        for action in self._reload_actions:
+            action.setEnabled(False)
+        self._export_worker = worker
+        worker.start()
+        progress_dialog.show()
+
+    def closeEvent(self, event):
+        """
+        Cancels a running export (its partial file is discarded), the
+        prefetch and pending personnel analysis, and lets a running load
+        finish before the window closes.
+        """
+        if self._export_worker is not None and self._export_worker.isRunning():
+            self._export_worker.requestInterruption()
+            self._export_worker.wait()
+        if self._data_loader is not None and self._data_loader.isRunning():
+            self._data_loader.wait()
+        self._stop_prefetch()
+        self._personnel_timer.stop()
+        self._personnel_worker.stop()
+        super().closeEvent(event)
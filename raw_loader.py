@@ -1,59 +1,181 @@
+import numpy as np
+import openpyxl
 import pandas as pd
 import re
 import os
 import csv
+from array import array
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# Precompiled sanitization tables, shared by every column and every workbook.
+# Arabic letters, ZWNJ and both Persian/Arabic digit sets in a single table.
+_CHAR_TRANSLATION = str.maketrans({
+    'ي': 'ی',
+    'ك': 'ک',
+    '\u200c': ' ',  # ZWNJ to space
+    '۰': '0', '۱': '1', '۲': '2', '۳': '3', '۴': '4',
+    '۵': '5', '۶': '6', '۷': '7', '۸': '8', '۹': '9',
+    '٠': '0', '١': '1', '٢': '2', '٣': '3', '٤': '4',
+    '٥': '5', '٦': '6', '٧': '7', '٨': '8', '٩': '9',
+})
+
+# Plain substring rewrites applied before character translation, in order.
+_PRE_REPLACEMENTS = (
+    ('pds , ', 'pds و '),
+    ('ISO 10002 , ISO 10004', 'ISO 10002 و ISO 10004'),
+    (', ', '&&&'),
+)
+
+# Everything outside ASCII letters/digits, the Arabic block and whitespace,
+# plus the Arabic comma (U+060C), is dropped in one pass.
+_DISALLOWED_CHARS_RE = re.compile(r'[^a-zA-Z0-9\u0600-\u060B\u060D-\u06FF\s]')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+# Columns whose values have all spaces removed.
+_SPACELESS_COLUMNS = ('نام دوره آموزشی', 'عنوان دوره')
+
+
+def _sanitize_strings(values, remove_spaces=False):
+    """
+    Sanitize a Series of strings with vectorized .str operations.
+    Output is identical to sanitizing each value on its own.
+    """
+    for old, new in _PRE_REPLACEMENTS:
+        values = values.str.replace(old, new, regex=False)
+    if remove_spaces:
+        values = values.str.replace(' ', '', regex=False)
+
+    values = values.str.translate(_CHAR_TRANSLATION)
+    values = values.str.replace('&&&', 'ampersand', regex=False)
+    values = values.str.replace(_DISALLOWED_CHARS_RE, '', regex=True)
+    values = values.str.lower()  # Convert all English letters to lowercase here
+    values = values.str.replace('ampersand', '&&&', regex=False)
+    values = values.str.replace(_WHITESPACE_RE, ' ', regex=True).str.strip()
+    return values
+
+
+def _factorize_text(series):
+    """Return (codes, distinct strings) for a column; missing values get code -1."""
+    # str() every cell first so that e.g. 1 and 1.0 stay distinct keys
+    return pd.factorize(series.map(str, na_action='ignore'))
+
 
 def sanitize_dataframe(df):
     """
     Sanitize all values in a DataFrame using Persian normalization rules.
     Remove spaces only in columns 'نام دوره آموزشی' and 'عنوان دوره'.
     Convert Persian digits to English digits.
+
+    Distinct values are pooled across columns and sanitized only once,
+    then broadcast back to every cell; missing values become "".
     """
-    persian_map = {
-        'ي': 'ی',
-        'ك': 'ک',
-        '\u200c': ' ',  # ZWNJ to space
-    }
-    
-    # Persian/Arabic digit to English digit mapping
-    persian_digits_map = {
-        '۰': '0', '۱': '1', '۲': '2', '۳': '3', '۴': '4',
-        '۵': '5', '۶': '6', '۷': '7', '۸': '8', '۹': '9',
-        '٠': '0', '١': '1', '٢': '2', '٣': '3', '٤': '4',
-        '٥': '5', '٦': '6', '٧': '7', '٨': '8', '٩': '9'
-    }
-
-    def sanitize(text, remove_spaces=False):
-        if pd.isna(text):
-            return ""
-        text = str(text)
-        text = text.replace('pds , ','pds و ')
-        text = text.replace('ISO 10002 , ISO 10004','ISO 10002 و ISO 10004')
-
-        text = text.replace(', ', '&&&')
-        if remove_spaces:
-            text = text.replace(' ', '')  # Remove spaces only for specified columns
-        
-        # Convert Persian characters
-        for arabic_char, persian_char in persian_map.items():
-            text = text.replace(arabic_char, persian_char)
-        
-        # Convert Persian/Arabic digits to English digits
-        for persian_digit, english_digit in persian_digits_map.items():
-            text = text.replace(persian_digit, english_digit)
-            
-        text = text.replace('&&&', 'ampersand')
-        text = text.replace('،', '')
-        text = re.sub(r'[^a-zA-Z0-9\u0600-\u06FF\s]', '', text)
-        text = text.lower()  # Convert all English letters to lowercase here
-        text = text.replace('ampersand', '&&&')
-        text = re.sub(r'\s+', ' ', text).strip()
-        return text
-
-    # Apply sanitize to each cell, checking if the column needs space removal
-    for col in df.columns:
-        remove_spaces = col in ['نام دوره آموزشی', 'عنوان دوره']
-        df[col] = df[col].apply(lambda x: sanitize(x, remove_spaces=remove_spaces))
+    columns = [col for col in df.columns if not df[col].empty]
+
+    for remove_spaces in (False, True):
+        group = [col for col in columns if (col in _SPACELESS_COLUMNS) == remove_spaces]
+        if not group:
+            continue
+
+        factorized = [_factorize_text(df[col]) for col in group]
+        pool_codes, pool = pd.factorize(np.concatenate([uniques for _, uniques in factorized]))
+        sanitized = _sanitize_strings(pd.Series(pool, dtype=object), remove_spaces).to_numpy(dtype=object)
+
+        offset = 0
+        for col, (codes, uniques) in zip(group, factorized):
+            lookup = np.append(sanitized[pool_codes[offset:offset + len(uniques)]], '')  # code -1 (NaN) -> ""
+            offset += len(uniques)
+            df[col] = pd.Series(lookup[codes], index=df.index, dtype=object)
+
+    return df
+
+
+# Columns each workbook actually needs and their dtype after sanitizing,
+# keyed like the per-file rules below. Everything else is dropped at parse
+# time. dealers.xlsx has no schema: its car category block is read by position.
+# Low-cardinality text (dealers, companies, positions, courses, codes) is
+# dictionary-encoded as 'category'; free text stays as plain str objects.
+_TEXT = 'object'
+_CATEGORY = 'category'
+WORKBOOK_SCHEMAS = {
+    'raw': {
+        'عنوان نمایندگی': _CATEGORY,
+        'کد پرسنلی': _CATEGORY,
+        'نام و نام خانوادگی': _TEXT,
+        'عنوان شغل': _CATEGORY,
+        'شغل موازی (ارتقا)': _CATEGORY,
+        'عنوان دوره': _CATEGORY,
+        'company': _CATEGORY,
+    },
+    'after': {
+        'نام خودرو': _CATEGORY,
+        'پست کاری': _CATEGORY,
+        'نام سرفصل': _CATEGORY,
+        'نام دوره آموزشی': _CATEGORY,
+    },
+    'sales': {
+        'نام خودرو': _CATEGORY,
+        'پست کاری': _CATEGORY,
+        'نام سرفصل': _CATEGORY,
+        'نام دوره آموزشی': _CATEGORY,
+    },
+}
+
+
+def get_workbook_schema(filename):
+    """Returns the {column: dtype} schema for a workbook file name, or None to keep all columns."""
+    for key, schema in WORKBOOK_SCHEMAS.items():
+        if key in filename:
+            return schema
+    return None
+
+
+def _schema_usecols(schema, dropped):
+    """usecols callable for pd.read_excel that keeps schema columns and records the rest in dropped."""
+    def keep(column):
+        if schema is None or column in schema:
+            return True
+        dropped.append(column)
+        return False
+    return keep
+
+
+def _apply_schema_dtypes(df, schema):
+    """Casts schema columns to their declared dtype (text columns are left as sanitized str)."""
+    if schema:
+        dtypes = {col: dtype for col, dtype in schema.items()
+                  if col in df.columns and dtype != _TEXT and df[col].dtype != dtype}
+        if dtypes:
+            df = df.astype(dtypes)
+    return df
+
+
+def _categorical_columns(schema):
+    """Names of the schema columns declared as 'category'."""
+    return {col for col, dtype in (schema or {}).items() if dtype == _CATEGORY}
+
+
+def _report_dropped(label, dropped):
+    if dropped:
+        print(f"🧹 {label}: dropped {len(dropped)} unused columns: {', '.join(map(str, dropped))}")
+
+
+def _postprocess_sheet(df, filename, dealer_mappings):
+    """
+    Applies the per-file rules to a sanitized sheet:
+    default car names for 'after.xlsx' and 'sales.xlsx', and dealer
+    mappings for everything except 'dealers.xlsx'.
+    """
+    if 'after' in filename:
+        if 'نام خودرو' in df.columns:
+            df['نام خودرو'] = df['نام خودرو'].apply(lambda x: x if x else 'عمومی')
+    elif 'sales' in filename:
+        if 'نام خودرو' not in df.columns:
+            df['نام خودرو'] = 'عمومی'
+
+    # Apply dealer mappings for raw data files
+    if 'raw' in filename or 'dealers' not in filename:  # Apply to raw data, not dealers data
+        df = apply_dealer_mappings(df, dealer_mappings)
 
     return df
 
@@ -65,24 +187,16 @@ def load_sanitized_data(file_path):
     Also applies dealer mappings if available.
     """
     try:
-        df = pd.read_excel(file_path)
-        df = sanitize_dataframe(df)
-
         filename = os.path.basename(file_path).lower()
+        schema = get_workbook_schema(filename)
+        dropped = []
 
-        if 'after' in filename:
-            if 'نام خودرو' in df.columns:
-                df['نام خودرو'] = df['نام خودرو'].apply(lambda x: x if x else 'عمومی')
-        elif 'sales' in filename:
-            if 'نام خودرو' not in df.columns:
-                df['نام خودرو'] = 'عمومی'
-        
-        # Apply dealer mappings for raw data files
-        if 'raw' in filename or 'dealers' not in filename:  # Apply to raw data, not dealers data
-            dealer_mappings = load_dealer_mappings()
-            df = apply_dealer_mappings(df, dealer_mappings)
+        df = pd.read_excel(file_path, usecols=_schema_usecols(schema, dropped))
+        _report_dropped(filename, dropped)
+        df = sanitize_dataframe(df)
 
-        return df
+        df = _postprocess_sheet(df, filename, load_dealer_mappings())
+        return _apply_schema_dtypes(df, schema)
 
     except Exception as e:
         print(f"Error loading {file_path}: {e}")
@@ -117,39 +231,251 @@ def apply_dealer_mappings(df, dealer_mappings):
     return df
 
 
-def load_all_sanitized_sheets(file_path):
+def iter_workbook_sheets(file_path, usecols=None):
+    """
+    Yields (sheet_name, DataFrame) for every worksheet of an Excel file.
+    The workbook archive is opened and inflated once for all sheets.
+    """
+    with pd.ExcelFile(file_path) as excel_file:
+        for sheet_name in excel_file.sheet_names:
+            yield sheet_name, excel_file.parse(sheet_name, usecols=usecols)
+
+
+def load_all_sanitized_sheets(file_path, max_workers=None):
     """
     Load and sanitize all worksheets in an Excel file.
     Returns a dictionary {sheet_name: sanitized DataFrame}.
     Applies same special handling as load_sanitized_data.
     Also applies dealer mappings if available.
+
+    Sheets are parsed from a single pass over the workbook; each sheet is
+    handed to a worker for sanitizing as soon as it has been parsed.
     """
     try:
-        excel_file = pd.ExcelFile(file_path)
-        sanitized_sheets = {}
         filename = os.path.basename(file_path).lower()
 
+        schema = get_workbook_schema(filename)
+        dropped = []
+
         # Load dealer mappings once
         dealer_mappings = load_dealer_mappings()
 
-        for sheet_name in excel_file.sheet_names:
-            df = pd.read_excel(file_path, sheet_name=sheet_name)
-            df = sanitize_dataframe(df)
-
-            if 'after' in filename:
-                if 'نام خودرو' in df.columns:
-                    df['نام خودرو'] = df['نام خودرو'].apply(lambda x: x if x else 'عمومی')
-            elif 'sales' in filename:
-                if 'نام خودرو' not in df.columns:
-                    df['نام خودرو'] = 'عمومی'
-            
-            # Apply dealer mappings for raw data files
-            if 'raw' in filename or 'dealers' not in filename:  # Apply to raw data, not dealers data
-                df = apply_dealer_mappings(df, dealer_mappings)
-
-            sanitized_sheets[sheet_name] = df
-
-        return sanitized_sheets
+        def process(df):
+            df = _postprocess_sheet(sanitize_dataframe(df), filename, dealer_mappings)
+            return _apply_schema_dtypes(df, schema)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = {}
+            for sheet_name, df in iter_workbook_sheets(file_path, _schema_usecols(schema, dropped)):
+                _report_dropped(f"{filename} [{sheet_name}]", dropped)
+                dropped.clear()
+                futures[sheet_name] = pool.submit(process, df)
+            return {sheet_name: future.result() for sheet_name, future in futures.items()}
     except Exception as e:
         print(f"Error loading sheets from {file_path}: {e}")
-        return {}
\ No newline at end of file
+        return {}
+
+
+def _excel_cell_value(cell):
+    """Converts a read-only openpyxl cell the same way pandas' Excel reader does."""
+    if cell.value is None or cell.data_type == 'e':  # empty and error cells (#N/A, ...)
+        return None
+    if isinstance(cell.value, float) and cell.value.is_integer():
+        return int(cell.value)
+    return cell.value
+
+
+def _excel_header(header_row):
+    """Builds column names like pd.read_excel: 'Unnamed: i' for blanks, '.1' suffixes for duplicates."""
+    columns = []
+    seen = {}
+    for idx, value in enumerate(header_row):
+        name = f"Unnamed: {idx}" if value is None else value
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        seen.setdefault(name, 0)
+        columns.append(name)
+    return columns
+
+
+def _coerce_numeric_text(df):
+    """
+    Converts text cells to numbers in columns where every value is numeric,
+    as pd.read_excel does (e.g. a personnel code stored as '0017584906').
+    Integral values become int so they render without a trailing '.0'.
+    """
+    for col in df.columns:
+        is_text = df[col].map(lambda value: isinstance(value, str))
+        if not is_text.any():
+            continue
+        numeric = pd.to_numeric(df.loc[is_text, col], errors='coerce')
+        if numeric.isna().any():
+            continue  # at least one genuine text value: keep the column as text
+        df.loc[is_text, col] = pd.Series(
+            [int(v) if float(v).is_integer() else float(v) for v in numeric],
+            index=numeric.index, dtype=object,
+        )
+    return df
+
+
+def iter_excel_chunks(file_path, chunk_size=5000, usecols=None):
+    """
+    Yields DataFrames of at most chunk_size rows from the first worksheet,
+    read with openpyxl's read-only row iterator so the sheet is never fully
+    materialized. The first row is the header; usecols, if given, is called
+    with each column name and decides whether the column is kept.
+
+    Column types are inferred per chunk rather than over the whole sheet:
+    numeric text is converted only when the whole chunk column is numeric,
+    and integral numbers stay int even in columns with gaps (pd.read_excel
+    would turn such a column into float). Blank rows are kept except at the
+    end of the sheet; cells beyond the header's width are ignored.
+    """
+    workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        sheet = workbook.worksheets[0]
+        sheet.reset_dimensions()  # read-only sheets may carry stale dimensions
+        rows = sheet.iter_rows()
+
+        header_row = next(rows, None)
+        if header_row is None:
+            return
+        header = [_excel_cell_value(cell) for cell in header_row]
+        while header and header[-1] is None:
+            header.pop()
+        columns = _excel_header(header)
+        width = len(columns)
+        keep = [idx for idx, col in enumerate(columns) if usecols is None or usecols(col)]
+        columns = [columns[idx] for idx in keep]
+
+        chunk = []
+        pending_blank = 0  # blank rows are only emitted once a later row has data
+        for row in rows:
+            values = [_excel_cell_value(cell) for cell in row[:width]]
+            if all(value is None for value in values):
+                pending_blank += 1
+                continue
+            values.extend([None] * (width - len(values)))
+            chunk.extend([[None] * len(keep)] * pending_blank)
+            pending_blank = 0
+            chunk.append([values[idx] for idx in keep])
+
+            if len(chunk) >= chunk_size:
+                yield _coerce_numeric_text(pd.DataFrame(chunk, columns=columns, dtype=object))
+                chunk = []
+
+        if chunk:
+            yield _coerce_numeric_text(pd.DataFrame(chunk, columns=columns, dtype=object))
+    finally:
+        workbook.close()
+
+
+class ColumnStore:
+    """
+    Append-only, dictionary-encoded column store.
+
+    Each column keeps a vocabulary of distinct values and an int32 code per
+    row, so memory grows with the number of distinct strings rather than the
+    number of cells. to_frame() rebuilds a DataFrame whose object cells share
+    one str object per distinct value; categorical columns are built straight
+    from the stored codes.
+    """
+
+    def __init__(self):
+        self.columns = []
+        self._vocab = {}  # column -> {value: code}
+        self._codes = {}  # column -> array('i')
+        self.num_rows = 0
+
+    def append(self, df):
+        """Encodes and appends the rows of df; its columns must match earlier chunks."""
+        if not self.columns:
+            self.columns = list(df.columns)
+            for col in self.columns:
+                self._vocab[col] = {}
+                self._codes[col] = array('i')
+
+        for col in self.columns:
+            vocab = self._vocab[col]
+            codes, uniques = pd.factorize(df[col], use_na_sentinel=False)
+            for value in uniques:
+                vocab.setdefault(value, len(vocab))
+            remap = np.fromiter((vocab[value] for value in uniques), dtype=np.int32, count=len(uniques))
+            self._codes[col].frombytes(remap[codes].astype(np.int32).tobytes())
+
+        self.num_rows += len(df)
+
+    def to_frame(self, categorical=()):
+        """
+        Decodes the store into a DataFrame with a fresh RangeIndex. Columns in
+        categorical become 'category' columns (sorted categories, as astype
+        would give) without expanding them to one object per row first.
+        """
+        data = {}
+        for col in self.columns:
+            values = np.empty(len(self._vocab[col]), dtype=object)
+            values[:] = list(self._vocab[col])
+            codes = np.frombuffer(self._codes[col], dtype=np.int32)
+            if col in categorical:
+                # Rank of each distinct value among the sorted categories; missing values get -1
+                ranks, categories = pd.factorize(values, sort=True)
+                data[col] = pd.Categorical.from_codes(ranks.astype(np.int32)[codes], categories=categories)
+            else:
+                # An explicit dtype skips pandas' per-row type inference over the column
+                data[col] = pd.Series(values[codes], dtype=object, copy=False)
+        return pd.DataFrame(data, columns=self.columns, copy=False)
+
+
+def sanitize_chunk(df, filename, dealer_mappings):
+    """Sanitizes and post-processes one chunk of rows; safe to run in a worker process."""
+    return _postprocess_sheet(sanitize_dataframe(df), filename, dealer_mappings)
+
+
+def load_sanitized_data_streaming(file_path, chunk_size=5000, progress_callback=None, executor=None,
+                                  max_pending=None):
+    """
+    Bounded-memory variant of load_sanitized_data for very large single-sheet
+    exports. Rows are read in chunks of chunk_size, each chunk is sanitized,
+    post-processed and dealer-mapped on its own, then appended to a
+    ColumnStore. progress_callback, if given, is called with the number of
+    rows processed so far after every chunk.
+
+    With an executor (e.g. a ProcessPoolExecutor), chunks are sanitized by
+    its workers while the next rows are read. Results are appended in sheet
+    order; at most max_pending chunks (default: twice the CPU count) are in
+    flight at a time.
+    """
+    try:
+        filename = os.path.basename(file_path).lower()
+        schema = get_workbook_schema(filename)
+        dropped = []
+        dealer_mappings = load_dealer_mappings()
+        store = ColumnStore()
+
+        def collect(df):
+            store.append(df)
+            if progress_callback:
+                progress_callback(store.num_rows)
+
+        if executor is None:
+            for chunk in iter_excel_chunks(file_path, chunk_size, _schema_usecols(schema, dropped)):
+                collect(sanitize_chunk(chunk, filename, dealer_mappings))
+            _report_dropped(filename, dropped)
+            return _apply_schema_dtypes(store.to_frame(_categorical_columns(schema)), schema)
+
+        max_pending = max_pending or 2 * (os.cpu_count() or 1)
+        pending = deque()
+        for chunk in iter_excel_chunks(file_path, chunk_size, _schema_usecols(schema, dropped)):
+            pending.append(executor.submit(sanitize_chunk, chunk, filename, dealer_mappings))
+            if len(pending) >= max_pending:
+                collect(pending.popleft().result())
+        while pending:
+            collect(pending.popleft().result())
+
+        _report_dropped(filename, dropped)
+        return _apply_schema_dtypes(store.to_frame(_categorical_columns(schema)), schema)
+
+    except Exception as e:
+        print(f"Error loading {file_path}: {e}")
+        return pd.DataFrame()
@@ -0,0 +1,161 @@
+import numpy as np
+import pandas as pd
+from pandas.api.types import CategoricalDtype
+
+from data_manager import DataManager
+
+BDC_TO_SMC = {'1001': '2001 سیبا تهران', '1002': '2002 سیبا شیراز'}
+
+
+def legacy_apply_dual_dealer_logic(raw, bdc_to_smc_map):
+    """Frozen copy of the iterrows-based apply_dual_dealer_logic that the vectorized one replaces."""
+    def _filter_positions(position_str, keyword):
+        if not position_str:
+            return ''
+        parts = position_str.split('&&&')
+        filtered = [p for p in parts if keyword in p]
+        return '&&&'.join(filtered).strip()
+
+    new_rows = []
+    for idx, row in raw.iterrows():
+        company = row['company']
+        dealer_name = row['عنوان نمایندگی']
+        dealer_code = str(dealer_name).split(" ")[0]
+
+        if company != 'bdc' or dealer_code not in bdc_to_smc_map:
+            new_rows.append(row)
+            continue
+
+        main_pos = str(row.get('عنوان شغل', '') or '')
+        alt_pos = str(row.get('شغل موازی (ارتقا)', '') or '')
+        full_pos = main_pos + '&&&' + alt_pos if alt_pos else main_pos
+
+        diesel_present = 'دیزل' in full_pos
+        siba_present = 'سیبا' in full_pos
+
+        if diesel_present and not siba_present:
+            new_rows.append(row)
+
+        elif siba_present and not diesel_present:
+            new_row = row.copy()
+            new_row['company'] = 'smc'
+            new_row['عنوان نمایندگی'] = bdc_to_smc_map[dealer_code]
+            new_rows.append(new_row)
+
+        elif diesel_present and siba_present:
+            bdc_row = row.copy()
+            bdc_row['company'] = 'bdc'
+            bdc_row['عنوان نمایندگی'] = dealer_name
+            bdc_row['عنوان شغل'] = _filter_positions(bdc_row.get('عنوان شغل', ''), 'دیزل')
+            bdc_row['شغل موازی (ارتقا)'] = _filter_positions(bdc_row.get('شغل موازی (ارتقا)', ''), 'دیزل')
+
+            smc_row = row.copy()
+            smc_row['company'] = 'smc'
+            smc_row['عنوان نمایندگی'] = bdc_to_smc_map[dealer_code]
+            smc_row['عنوان شغل'] = _filter_positions(smc_row.get('عنوان شغل', ''), 'سیبا')
+            smc_row['شغل موازی (ارتقا)'] = _filter_positions(smc_row.get('شغل موازی (ارتقا)', ''), 'سیبا')
+
+            new_rows.extend([bdc_row, smc_row])
+
+        else:
+            bdc_row = row.copy()
+            bdc_row['company'] = 'bdc'
+            bdc_row['عنوان نمایندگی'] = dealer_name
+            new_rows.append(bdc_row)
+
+            smc_row = row.copy()
+            smc_row['company'] = 'smc'
+            smc_row['عنوان نمایندگی'] = bdc_to_smc_map[dealer_code]
+            if pd.notna(smc_row.get('عنوان شغل')):
+                original_pos = smc_row['عنوان شغل'].strip()
+                if original_pos == 'مکانیک کار':
+                    smc_row['عنوان شغل'] = 'مکانیک سیبا موتور'
+            if pd.notna(smc_row.get('عنوان شغل')) and 'مکانیک' in smc_row['عنوان شغل']:
+                smc_row['عنوان شغل'] = 'مکانیک سیبا موتور'
+            if pd.notna(smc_row.get('شغل موازی (ارتقا)')):
+                alt_pos_parts = []
+                for p in smc_row['شغل موازی (ارتقا)'].split('&&&'):
+                    if 'مکانیک' in p.strip():
+                        alt_pos_parts.append('مکانیک سیبا موتور')
+                    else:
+                        alt_pos_parts.append(p.strip())
+                smc_row['شغل موازی (ارتقا)'] = '&&&'.join(alt_pos_parts)
+
+            new_rows.append(smc_row)
+
+    return pd.DataFrame(new_rows)
+
+
+# (company, dealer, main position, parallel positions)
+ROWS = [
+    ('bdc', '1001 دیزل تهران', 'تکنسین دیزل', ''),                           # diesel only
+    ('bdc', '1001 دیزل تهران', 'مشاور سیبا', 'انباردار سیبا'),                # siba only
+    ('bdc', '1001 دیزل تهران', 'مکانیک دیزل', 'مکانیک سیبا&&&انباردار دیزل&&&پذیرشگر'),  # both
+    ('bdc', '1001 دیزل تهران', 'پذیرشگر', ' مشاور سیبا '),                    # both, siba only in parallel
+    ('bdc', '1002 دیزل شیراز', 'مکانیک کار', 'مکانیک ارشد&&& انباردار '),      # neither, mechanic rewrite
+    ('bdc', '1002 دیزل شیراز', 'مدیر', ''),                                   # neither, empty parallel
+    ('bdc', '1002 دیزل شیراز', 'انباردار', 'مکانیک'),                         # neither, mechanic in parallel
+    ('bdc', '1002 دیزل شیراز', 'کارمند', np.nan),                             # neither, missing parallel
+    ('bdc', '1003 دیزل تبریز', 'مشاور سیبا', ''),                             # dealer not in bdc_to_smc
+    ('smc', '1001 دیزل تهران', 'مشاور سیبا', 'مکانیک'),                       # not a BDC row
+    ('bdc', '1001 دیزل تهران', '', ''),                                       # neither, no positions
+]
+
+
+def _raw_frame(categorical):
+    raw = pd.DataFrame(ROWS, columns=['company', 'عنوان نمایندگی', 'عنوان شغل', 'شغل موازی (ارتقا)'])
+    raw.insert(0, 'کد پرسنلی', [f'p{i}' for i in range(len(raw))])
+    raw['عنوان دوره'] = 'ایمنی'
+    raw.index = pd.Index(np.arange(len(raw)) * 10 + 7)[::-1]  # non-default, descending labels
+    if categorical:
+        for col in ('کد پرسنلی', 'company', 'عنوان نمایندگی', 'عنوان شغل', 'عنوان دوره'):
+            raw[col] = raw[col].astype('category')
+    return raw
+
+
+def _split(raw):
+    dm = DataManager()
+    dm.bdc_to_smc_map = dict(BDC_TO_SMC)
+    dm.raw = raw
+    dm.apply_dual_dealer_logic()
+    return dm.raw
+
+
+def test_matches_legacy():
+    raw = _raw_frame(categorical=False)
+    expected = legacy_apply_dual_dealer_logic(raw, BDC_TO_SMC)
+    pd.testing.assert_frame_equal(_split(raw), expected)
+
+
+def test_matches_legacy_with_categorical_columns():
+    raw = _raw_frame(categorical=True)
+    expected = legacy_apply_dual_dealer_logic(raw, BDC_TO_SMC)
+    result = _split(raw)
+
+    for col in raw.columns:
+        if isinstance(raw[col].dtype, CategoricalDtype):
+            assert isinstance(result[col].dtype, CategoricalDtype), col
+    pd.testing.assert_frame_equal(result.astype(object), expected.astype(object))
+
+
+def test_split_cases():
+    result = _split(_raw_frame(categorical=False))
+    rows = list(zip(result['کد پرسنلی'], result['company'], result['عنوان نمایندگی'],
+                    result['عنوان شغل'], result['شغل موازی (ارتقا)']))
+
+    assert ('p0', 'bdc', '1001 دیزل تهران', 'تکنسین دیزل', '') in rows
+    assert ('p1', 'smc', '2001 سیبا تهران', 'مشاور سیبا', 'انباردار سیبا') in rows
+    assert ('p2', 'bdc', '1001 دیزل تهران', 'مکانیک دیزل', 'انباردار دیزل') in rows
+    assert ('p2', 'smc', '2001 سیبا تهران', '', 'مکانیک سیبا') in rows
+    assert ('p4', 'smc', '2002 سیبا شیراز', 'مکانیک سیبا موتور', 'مکانیک سیبا موتور&&&انباردار') in rows
+    assert ('p5', 'smc', '2002 سیبا شیراز', 'مدیر', '') in rows
+    assert ('p8', 'bdc', '1003 دیزل تبریز', 'مشاور سیبا', '') in rows
+    assert [code for code, company, *_ in rows if code == 'p1'] == ['p1']  # moved, not copied
+
+
+def test_without_dual_dealers_is_unchanged():
+    raw = _raw_frame(categorical=False)
+    dm = DataManager()
+    dm.raw = raw.copy()
+    dm.apply_dual_dealer_logic()
+    pd.testing.assert_frame_equal(dm.raw, raw)
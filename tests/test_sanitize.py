@@ -0,0 +1,102 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+from raw_loader import sanitize_dataframe
+
+
+def legacy_sanitize_dataframe(df):
+    """Frozen copy of the per-cell sanitize_dataframe that the vectorized one replaces."""
+    persian_map = {
+        'ي': 'ی',
+        'ك': 'ک',
+        '\u200c': ' ',  # ZWNJ to space
+    }
+
+    persian_digits_map = {
+        '۰': '0', '۱': '1', '۲': '2', '۳': '3', '۴': '4',
+        '۵': '5', '۶': '6', '۷': '7', '۸': '8', '۹': '9',
+        '٠': '0', '١': '1', '٢': '2', '٣': '3', '٤': '4',
+        '٥': '5', '٦': '6', '٧': '7', '٨': '8', '٩': '9'
+    }
+
+    def sanitize(text, remove_spaces=False):
+        if pd.isna(text):
+            return ""
+        text = str(text)
+        text = text.replace('pds , ', 'pds و ')
+        text = text.replace('ISO 10002 , ISO 10004', 'ISO 10002 و ISO 10004')
+
+        text = text.replace(', ', '&&&')
+        if remove_spaces:
+            text = text.replace(' ', '')
+
+        for arabic_char, persian_char in persian_map.items():
+            text = text.replace(arabic_char, persian_char)
+
+        for persian_digit, english_digit in persian_digits_map.items():
+            text = text.replace(persian_digit, english_digit)
+
+        text = text.replace('&&&', 'ampersand')
+        text = text.replace('،', '')
+        text = re.sub(r'[^a-zA-Z0-9\u0600-\u06FF\s]', '', text)
+        text = text.lower()
+        text = text.replace('ampersand', '&&&')
+        text = re.sub(r'\s+', ' ', text).strip()
+        return text
+
+    for col in df.columns:
+        remove_spaces = col in ['نام دوره آموزشی', 'عنوان دوره']
+        df[col] = df[col].apply(lambda x: sanitize(x, remove_spaces=remove_spaces))
+
+    return df
+
+
+EDGE_CASES = [
+    np.nan, None, pd.NaT, '',
+    0, 1, 1.0, 2.5, -3, True,
+    'علي كريمي', 'مهدی\u200cپور', 'کارمند\u200c, فروش',
+    'a, b, c', 'x&&&y', 'ampersand', 'AMPERSAND', 'Ampersand, AMPERSAND',
+    'pds , iso', 'ISO 10002 , ISO 10004', 'الف، ب،ج',
+    '۱۲۳۴۵۶۷۸۹۰', '١٢٣٤٥٦٧٨٩٠', 'کد ۰۱٢ abc',
+    '  multiple   spaces\t\nand tabs  ', 'Mixed-CASE (Text)!', 'دوره: «ایمنی» ۲',
+]
+
+
+def _edge_frame():
+    return pd.DataFrame({
+        'عنوان نمایندگی': EDGE_CASES,
+        'عنوان دوره': EDGE_CASES[::-1],
+        'نام دوره آموزشی': EDGE_CASES,
+        'mixed': pd.Series(EDGE_CASES, dtype=object).shift(3),
+    }, index=range(100, 100 + len(EDGE_CASES)))
+
+
+def test_matches_legacy_on_edge_cases():
+    expected = legacy_sanitize_dataframe(_edge_frame())
+    result = sanitize_dataframe(_edge_frame())
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_matches_legacy_on_typed_columns():
+    frame = lambda: pd.DataFrame({
+        'ints': [1, 2, 2, 40],
+        'floats': [1.0, np.nan, 1.5, 1.0],
+        'dates': pd.to_datetime(['2024-01-02', None, '2024-01-02', '2025-12-31']),
+        'empty': pd.Series([np.nan] * 4, dtype=object),
+    })
+    pd.testing.assert_frame_equal(sanitize_dataframe(frame()), legacy_sanitize_dataframe(frame()))
+
+
+def test_matches_legacy_on_random_strings():
+    alphabet = list('abcXYZ ,&،\u200cيكیک۰۹٠٩12 .-!ampersandAMPERSAND') + [', ', '&&&', 'pds , ']
+    rng = np.random.default_rng(0)
+    values = [''.join(rng.choice(alphabet, size=rng.integers(0, 12))) for _ in range(2000)]
+    frame = lambda: pd.DataFrame({'text': values, 'عنوان دوره': values[::-1]})
+    pd.testing.assert_frame_equal(sanitize_dataframe(frame()), legacy_sanitize_dataframe(frame()))
+
+
+def test_empty_frame():
+    frame = pd.DataFrame({'عنوان دوره': pd.Series([], dtype=object)})
+    pd.testing.assert_frame_equal(sanitize_dataframe(frame.copy()), legacy_sanitize_dataframe(frame.copy()))
@@ -1,26 +1,123 @@
 # training_analyzer.py
+import threading
 from collections import defaultdict
+from functools import lru_cache
+from types import MappingProxyType
+import numpy as np
 import pandas as pd
 
 
+def _freeze_requirements(grouped_reqs):
+    """Returns a read-only copy of a requirements bundle: nested mapping proxies with course tuples."""
+    return MappingProxyType({
+        file: MappingProxyType({
+            car: MappingProxyType({crit: tuple(courses) for crit, courses in criteria_dict.items()})
+            for car, criteria_dict in cars.items()
+        })
+        for file, cars in grouped_reqs.items()
+    })
+
+
+# Position shown for personnel rows that list no position at all
+NO_POSITION = 'بدون سمت'
+
+
+def _explode_roles(people, placeholder=None):
+    """
+    Explodes personnel rows into a roles table with one row per
+    (dealer, pcode, name, position), in row order with the main position
+    before the '&&&'-separated parallel positions. Rows without any position
+    are dropped, or get one role with the placeholder position if given.
+    """
+    columns = ['dealer', 'pcode', 'name', 'position']
+    if people.empty or 'عنوان شغل' not in people.columns:
+        return pd.DataFrame(columns=columns)
+
+    rows = pd.RangeIndex(len(people))
+    main = people['عنوان شغل'].astype(object).set_axis(rows)
+    main = main[main.notna()].str.strip()
+    parallel = people['شغل موازی (ارتقا)'].astype(object).set_axis(rows)
+    parallel = parallel[parallel.notna()].str.split('&&&').explode().str.strip()
+
+    positions = pd.concat([
+        pd.DataFrame({'row': main.index, 'slot': 0, 'position': main.to_numpy()}),
+        pd.DataFrame({'row': parallel.index, 'slot': parallel.groupby(level=0).cumcount().to_numpy() + 1,
+                      'position': parallel.to_numpy()}),
+    ], ignore_index=True)
+    positions = positions[positions['position'].notna() & (positions['position'] != '')]
+    if placeholder is not None:
+        missing = rows.difference(positions['row'])
+        positions = pd.concat([
+            positions,
+            pd.DataFrame({'row': missing, 'slot': 0, 'position': placeholder}),
+        ], ignore_index=True)
+    positions = positions.sort_values(['row', 'slot'], kind='stable')
+
+    taken = people.iloc[positions['row'].to_numpy()]
+    roles = pd.DataFrame({
+        'dealer': taken['عنوان نمایندگی'].astype(object).to_numpy(),
+        'pcode': taken['کد پرسنلی'].astype(object).to_numpy(),
+        'name': taken['نام و نام خانوادگی'].astype(object).to_numpy(),
+        'position': positions['position'].to_numpy(),
+    }, columns=columns)
+    return roles.drop_duplicates(ignore_index=True)
+
+
+def _format_progress(passed, total):
+    """Formats a passed/total count as a percentage string, or '-' when there is nothing to pass."""
+    if total == 0:
+        return "-"
+    return f"{(passed / total) * 100:.1f}%"
+
+
 class TrainingAnalyzer:
     """
     Handles all business logic related to analyzing personnel training status.
     This ensures consistency across UI display, exports, and other features.
     """
-    def __init__(self, data_manager):
+    def __init__(self, data_manager, requirements_memo_size=1024, summary_cache_size=256):
         self.dm = data_manager
 
+        # LRU memo of finished requirement bundles, cleared whenever dm.data_version changes
+        self._requirements_memo = lru_cache(maxsize=requirements_memo_size)(self._build_requirements)
+        self._memo_data_version = None
+
+        # Batch analysis of every person-role (see _get_compliance), rebuilt whenever dm.data_version changes
+        self._compliance = None
+        self._compliance_version = None
+        # Exports run on a worker thread while the UI keeps using the analyzer
+        self._compliance_lock = threading.Lock()
+
+        # LRU cache of per-dealer summaries keyed by (dealer name, dm.data_version)
+        self._summary_cache = lru_cache(maxsize=summary_cache_size)(self._build_dealer_personnel_summary)
 
-    def _get_requirements(self, mapped_company, mapped_position, mapped_categories, dealer_name=None, raw_company=None):
+    def requirements_memo_info(self):
+        """Hit/miss counters and size of the requirements memo (reset when the data changes)."""
+        return self._requirements_memo.cache_info()
+
+    def summary_cache_info(self):
+        """Hit/miss counters and size of the per-dealer summary cache."""
+        return self._summary_cache.cache_info()
+
+    def _get_requirements(self, mapped_company, mapped_position, mapped_categories, raw_company=None):
         """
         Gathers all training requirements (sales and after-sales) for a given role.
+        People sharing company, position and dealer categories share one
+        memoized, read-only bundle: {section: {car: {criteria: (courses, ...)}}}.
         """
+        if self._memo_data_version != self.dm.data_version:
+            self._requirements_memo.cache_clear()
+            self._memo_data_version = self.dm.data_version
+        return self._requirements_memo(mapped_company, mapped_position, frozenset(mapped_categories), raw_company)
+
+    def _build_requirements(self, mapped_company, mapped_position, mapped_categories, raw_company=None):
+        """Builds the requirements bundle for _get_requirements from the requirements index."""
         grouped_reqs = defaultdict(lambda: defaultdict(lambda: defaultdict(list)))
+        requirements_index = self.dm.get_requirements_index()
 
         # 1. Get After-Sales Requirements
         print(f"\n=== DEBUG: Processing After-Sales Requirements ===")
-        print(f"Dealer: {dealer_name}, Mapped Company: {mapped_company}, Mapped Position: {mapped_position}, Categories: {mapped_categories}")
+        print(f"Mapped Company: {mapped_company}, Mapped Position: {mapped_position}, Categories: {sorted(mapped_categories)}")
 
         # For SMC dealers, use the mapped company name to look up sheets
         if raw_company == 'smc':
@@ -38,20 +135,23 @@ class TrainingAnalyzer:
             lookup_key = mapped_company
             print(f"✅ Loaded after-sales sheet for key '{lookup_key}' with {len(after_sheet_df)} rows")
 
-            search_cars = mapped_categories + ["عمومی"]
+            search_cars = sorted(mapped_categories) + ["عمومی"]
             print(f"🔍 Looking for rows where position == '{mapped_position}' and car in {search_cars}")
 
-            matched_rows = 0
-            for _, row in after_sheet_df.iterrows():
-                row_pos = str(row.get("پست کاری", "")).strip()
-                row_car = str(row.get("نام خودرو", "")).strip() or "عمومی"
+            # Merge the matching car groups in the order they first appear in the sheet
+            matched_groups = []
+            for car in dict.fromkeys(search_cars):
+                entry = requirements_index.get((mapped_company, "after", mapped_position, car))
+                if entry:
+                    first_row, criteria_dict = entry
+                    matched_groups.append((first_row, car, criteria_dict))
+            matched_groups.sort(key=lambda group: group[0])
 
-                if row_pos == mapped_position and row_car in search_cars:
-                    criteria = str(row.get("نام سرفصل", "")).strip()
-                    course = str(row.get("نام دوره آموزشی", "")).strip()
-                    if criteria and course and criteria.lower() != "nan" and course.lower() != "nan":
-                        grouped_reqs["after"][row_car][criteria].append(course)
-                        matched_rows += 1
+            matched_rows = 0
+            for _, car, criteria_dict in matched_groups:
+                for criteria, courses in criteria_dict.items():
+                    grouped_reqs["after"][car][criteria].extend(courses)
+                    matched_rows += len(courses)
 
             if matched_rows == 0:
                 print(f"⚠️ No matching rows found for mapped position '{mapped_position}' in after-sales sheet.")
@@ -69,95 +169,229 @@ class TrainingAnalyzer:
         if sales_sheet_df is not None:
             lookup_key = mapped_company
             print(f"✅ Processing sales requirements from sheet for key '{lookup_key}'")
-            
-            for _, row in sales_sheet_df.iterrows():
-                row_pos = str(row.get("پست کاری", "")).strip()
-                if row_pos == mapped_position:
-                    criteria = str(row.get("نام سرفصل", "")).strip()
-                    course = str(row.get("نام دوره آموزشی", "")).strip()
-                    if criteria and course and criteria != "nan" and course != "nan":
-                        grouped_reqs["sales"]["فروش"][criteria].append(course)
+
+            entry = requirements_index.get((mapped_company, "sales", mapped_position, "فروش"))
+            if entry:
+                for criteria, courses in entry[1].items():
+                    grouped_reqs["sales"]["فروش"][criteria].extend(courses)
         else:
             lookup_key = mapped_company
             print(f"❌ No sales sheet found for key '{lookup_key}'")
         
-        return grouped_reqs
+        return _freeze_requirements(grouped_reqs)
 
 
-    def _calculate_pass_status(self, grouped_reqs, passed_courses_set):
+    def _resolve_roles(self, roles):
+        """
+        Attaches to each role its person id, raw company and requirement set
+        (one shared bundle per mapped company, position and dealer categories).
+        Roles of unknown people are dropped. Returns (roles, person records,
+        requirement bundles).
         """
-        Calculates the pass/fail status for each criterion based on the rules.
-        - Rule 1: Pass if any required course is in passed_courses_set.
+        persons = roles[['dealer', 'pcode']].drop_duplicates(ignore_index=True)
+        records = [self.dm.get_personnel_record(pcode, dealer)
+                   for dealer, pcode in zip(persons['dealer'], persons['pcode'])]
+        found = [record is not None for record in records]
+        persons = persons[found].reset_index(drop=True)
+        records = [record for record in records if record is not None]
+        persons['person'] = np.arange(len(persons))
+        persons['company'] = [record['company'] for record in records]
+        roles = roles.merge(persons, on=['dealer', 'pcode'])
+
+        # Dealer categories depend only on the dealer and the person's company
+        categories = {}
+        for dealer, company in dict.fromkeys(zip(roles['dealer'], roles['company'])):
+            if company == 'smc':
+                # For SMC dealers, use hardcoded categories
+                mapped_categories = ['j6', 'tigerv', 'عمومی']
+            else:
+                lookup_dealer_name = self.dm.get_training_data_dealer_name(dealer)
+                dealer_cats = self.dm.get_dealer_categories(lookup_dealer_name)
+                mapped_categories = [self.dm.car_mapping.get(cat, cat) for cat in dealer_cats]
+            categories[(dealer, company)] = frozenset(mapped_categories)
+
+        set_ids = {}
+        requirement_sets = []
+        role_sets = []
+        for dealer, company, position in zip(roles['dealer'], roles['company'], roles['position']):
+            mapped_company = self.dm.company_mapping.get(company, company)
+            mapped_position = self.dm.position_mapping.get(position, position)
+            requirements = self._get_requirements(
+                mapped_company, mapped_position, categories[(dealer, company)])
+            set_id = set_ids.get(id(requirements))
+            if set_id is None:
+                set_id = set_ids[id(requirements)] = len(requirement_sets)
+                requirement_sets.append(requirements)
+            role_sets.append(set_id)
+        roles['requirement_set'] = np.asarray(role_sets, dtype=np.int64)
+        return roles, records, requirement_sets
+
+    def _evaluate_roles(self, roles):
+        """
+        Computes pass status for every criterion of every role in a roles table
+        (dealer, pcode, name, position) by joining the roles to their
+        requirement sets; courses are compared as bitsets over the interned
+        course ids (see DataManager.course_bitset).
+
+        Returns (table, requirement_sets). table is in role order with one row
+        per (role, section, car, criterion) and the columns role, dealer, pcode,
+        name, position, requirement_set, section, car, criterion, courses,
+        passed and passed_course (the first required course the person passed);
+        a role without requirements keeps one row with NaN criterion fields.
+        requirement_sets[i] is the requirements bundle of set i.
+
+        - Rule 1: Pass if any required course is in the passed courses.
         - Rule 2: Pass if criteria name contains 'گازسوز' (exempt).
         - Rule 3: 'ابزار مخصوص' passes only if all other criteria in the same car group are passed.
         """
-        pass_status = defaultdict(lambda: defaultdict(dict))
-
-        # First pass: Handle standard passes and 'گازسوز' exemptions.
-        for file, cars in grouped_reqs.items():
-            for car, criteria_dict in cars.items():
-                for crit, courses in criteria_dict.items():
-                    passed = any(c in passed_courses_set for c in courses) or "گازسوز" in crit
-                    pass_status[file][car][crit] = passed
-
-        # Second pass: Handle conditional 'ابزار مخصوص' logic.
-        for file, cars in grouped_reqs.items():
-            for car, criteria_dict in cars.items():
-                for crit in criteria_dict.keys():
-                    if "ابزار مخصوص" in crit:
-                        other_crits = [c for c in criteria_dict.keys() if c != crit]
-                        all_others_passed = all(pass_status[file][car].get(c, False) for c in other_crits)
-                        pass_status[file][car][crit] = all_others_passed
-        
-        return pass_status
+        roles = roles.reset_index(drop=True)
+        roles.insert(0, 'role', np.arange(len(roles)))
+        roles, records, requirement_sets = self._resolve_roles(roles)
+
+        # Requirements table: one row per criterion of each requirement set, in bundle order
+        requirements = pd.DataFrame(
+            [(set_id, section, car, crit, courses)
+             for set_id, bundle in enumerate(requirement_sets)
+             for section, cars in bundle.items()
+             for car, criteria_dict in cars.items()
+             for crit, courses in criteria_dict.items()],
+            columns=['requirement_set', 'section', 'car', 'criterion', 'courses'])
+        requirements['item'] = np.arange(len(requirements))
+        requirements['course_bits'] = [self.dm.course_bitset(courses) for courses in requirements['courses']]
+
+        # Rule 1: one AND of the person's passed-course bitset with the criterion's course bitset
+        table = roles.merge(requirements, on='requirement_set')
+        passed_bits = np.array([record['passed_bits'] for record in records], dtype=object)
+        held = passed_bits[table['person'].to_numpy()] & table['course_bits'].to_numpy(dtype=object)
+        course_ids = self.dm.get_course_ids()
+        table['passed_course'] = [
+            next(c for c in courses if bits >> course_ids[c] & 1) if bits else None
+            for courses, bits in zip(table['courses'], held)]
+
+        table = pd.concat([table, roles[~roles['role'].isin(table['role'])]], ignore_index=True)
+        table = table.sort_values(['role', 'item'], kind='stable', ignore_index=True)
+
+        criteria = table['criterion'].fillna('')
+        passed = table['passed_course'].notna() | criteria.str.contains('گازسوز', regex=False)
+
+        # Rule 3: a special-tools criterion mirrors the rest of its car group
+        special = criteria.str.contains('ابزار مخصوص', regex=False)
+        if special.any():
+            # One all-reduce per car group: count the failures, less the criterion's own
+            groups = [table['role'], table['section'], table['car']]
+            failed = (~passed).astype(np.int64)
+            others_failed = failed.groupby(groups, dropna=False).transform('sum') - failed
+            first_pass = passed
+            passed = passed.mask(special, others_failed == 0)
+
+            # Several special criteria in one group are settled in order, each seeing the earlier results
+            repeated = special.groupby(groups, dropna=False).transform('sum') > 1
+            if repeated.any():
+                for rows in table[repeated].groupby(['role', 'section', 'car'], sort=False).indices.values():
+                    labels = table.index[repeated][rows]
+                    status = dict(zip(table.loc[labels, 'criterion'], first_pass[labels]))
+                    for crit in status:
+                        if "ابزار مخصوص" in crit:
+                            status[crit] = all(v for c, v in status.items() if c != crit)
+                    passed[labels] = list(status.values())
+
+        table['passed'] = passed.astype(bool)
+        table = table[['role', 'dealer', 'pcode', 'name', 'position', 'requirement_set',
+                       'section', 'car', 'criterion', 'courses', 'passed', 'passed_course']]
+        return table, requirement_sets
+
+    def analyze_all(self):
+        """
+        Batch training analysis of every person-role in the raw data: one long
+        DataFrame with a row per (dealer, pcode, name, position, section, car,
+        criterion), as described in _evaluate_roles. Computed once per
+        dm.data_version; the per-person and per-dealer methods are views over it.
+        """
+        return self._get_compliance()['table']
+
+    def _get_compliance(self):
+        """
+        Returns the batch analysis with its lookup indexes as one snapshot
+        ({'table', 'requirement_sets', 'by_dealer', 'by_role', 'role_lookup',
+        'roles', 'roles_by_dealer'}, where roles also lists personnel without
+        a position as NO_POSITION),
+        rebuilding it when dm.data_version changed. Views read a single
+        snapshot so a concurrent rebuild cannot mix tables and indexes.
+        """
+        with self._compliance_lock:
+            version = self.dm.data_version
+            if self._compliance is None or self._compliance_version != version:
+                # Tagged with the version read before the build, so data replaced meanwhile triggers a rebuild
+                roles = _explode_roles(self.dm.raw, placeholder=NO_POSITION)
+                table, requirement_sets = self._evaluate_roles(
+                    roles[roles['position'] != NO_POSITION].reset_index(drop=True))
+                first_roles = table.drop_duplicates(['dealer', 'pcode', 'position'])
+                self._compliance = {
+                    'table': table,
+                    'requirement_sets': requirement_sets,
+                    'by_dealer': table.groupby('dealer', sort=False).indices,
+                    'by_role': table.groupby('role', sort=False).indices,
+                    'role_lookup': dict(zip(
+                        zip(first_roles['dealer'], first_roles['pcode'], first_roles['position']),
+                        first_roles['role'])),
+                    'roles': roles,
+                    'roles_by_dealer': roles.groupby('dealer', sort=False).indices,
+                }
+                self._compliance_version = version
+            return self._compliance
+
+    def get_personnel_roles(self, dealer_name=None):
+        """
+        Returns the (dealer, pcode, name, position) roles of one dealer, or of
+        every dealer when dealer_name is None, in raw row order. Personnel
+        without a position are listed once as NO_POSITION.
+        """
+        compliance = self._get_compliance()
+        roles = compliance['roles']
+        if dealer_name is None:
+            return roles
+        return roles.iloc[compliance['roles_by_dealer'].get(dealer_name, [])]
+
+    def _dealer_compliance(self, dealer_name):
+        """Rows of analyze_all() for one dealer whose position can be mapped."""
+        compliance = self._get_compliance()
+        table = compliance['table'].iloc[compliance['by_dealer'].get(dealer_name, [])]
+        return table[table['position'].isin(list(self.dm.position_mapping))]
 
 
     def analyze_personnel_training(self, pcode, dealer_name, position):
         """
         Performs a full training analysis for a single person in a specific role.
         """
-        personnel_data = self.dm.raw[
-            (self.dm.raw['کد پرسنلی'] == pcode) &
-            (self.dm.raw['عنوان نمایندگی'] == dealer_name)
-        ]
-        if personnel_data.empty:
+        record = self.dm.get_personnel_record(pcode, dealer_name)
+        if record is None:
             return None
 
-        # Apply mappings
-        raw_company = personnel_data.iloc[0].get('company', '')
-        mapped_company = self.dm.company_mapping.get(raw_company, raw_company)
-        mapped_position = self.dm.position_mapping.get(position, position)
-        
-
-        # CRITICAL FIX: For SMC dealers, use hardcoded categories
-        if raw_company == 'smc':
-            # For SMC dealers, use hardcoded categories
-            mapped_categories = ['j6', 'tigerv', 'عمومی']
-            print(f"SMC dealer detected - using hardcoded categories: {mapped_categories}")
+        compliance = self._get_compliance()
+        role = compliance['role_lookup'].get((dealer_name, pcode, position))
+        if role is not None:
+            table = compliance['table'].iloc[compliance['by_role'][role]]
+            requirement_sets = compliance['requirement_sets']
         else:
-            lookup_dealer_name = self.dm.get_training_data_dealer_name(dealer_name)
-            print(f"Non-SMC dealer - using training data dealer name: {lookup_dealer_name}")
-            dealer_cats = self.dm.get_dealer_categories(lookup_dealer_name)
-            mapped_categories = [self.dm.car_mapping.get(cat, cat) for cat in dealer_cats]
+            # A position the raw data does not list for this person; evaluate it on its own
+            roles = pd.DataFrame({'dealer': [dealer_name], 'pcode': [pcode],
+                                  'name': [record['name']], 'position': [position]})
+            table, requirement_sets = self._evaluate_roles(roles)
 
-
-        # Get passed courses
-        passed_courses = personnel_data['عنوان دوره'].dropna().unique().tolist()
-        mapped_passed_courses = {self.dm.course_mapping.get(c, c) for c in passed_courses}
-        
-        # Get all requirements - pass dealer_name for SMC handling
-        requirements = self._get_requirements(mapped_company, mapped_position, mapped_categories, dealer_name)
-        
-        pass_statuses = self._calculate_pass_status(requirements, mapped_passed_courses)
+        pass_statuses = defaultdict(lambda: defaultdict(dict))
+        criteria = table[table['criterion'].notna()]
+        for file, car, crit, passed in zip(criteria['section'], criteria['car'],
+                                           criteria['criterion'], criteria['passed']):
+            pass_statuses[file][car][crit] = bool(passed)
 
         # Structure the final result
         analysis_result = {
             "pcode": pcode,
-            "name": personnel_data.iloc[0]['نام و نام خانوادگی'],
+            "name": record['name'],
             "position": position,
             "dealer_name": dealer_name,
-            "passed_courses_set": mapped_passed_courses,
-            "requirements": requirements,
+            "passed_courses_set": record['passed_courses'],
+            "requirements": requirement_sets[table['requirement_set'].iat[0]],
             "pass_statuses": pass_statuses,
         }
         return analysis_result
@@ -166,158 +400,65 @@ class TrainingAnalyzer:
     def generate_dealer_personnel_summary(self, dealer_name):
         """
         Generates a summary of training progress for each person-position
-        at a specific dealer. (FIXED VERSION)
+        at a specific dealer. Results are cached per dealer and data version.
         """
-        summary_list = []
-        dealer_personnel = self.dm.get_personnel_for_dealer(dealer_name)
-        seen_combinations = set()
-
-        for _, row in dealer_personnel.iterrows():
-            name = row['نام و نام خانوادگی']
-            pcode = row.get('کد پرسنلی', '')
-            
-            # Get all positions for this person
-            positions = []
-            if pd.notna(row.get('عنوان شغل')) and row.get('عنوان شغل').strip():
-                positions.append(row.get('عنوان شغل').strip())
-            if pd.notna(row.get('شغل موازی (ارتقا)')) and row.get('شغل موازی (ارتقا)').strip():
-                positions.extend([p.strip() for p in row.get('شغل موازی (ارتقا)').split('&&&') if p.strip()])
-            
-            for pos in positions:
-                # Skip if we've already processed this combination OR if position is not mappable
-                if (pcode, pos) in seen_combinations or pos not in self.dm.position_mapping:
-                    continue
-                seen_combinations.add((pcode, pos))
-
-                # Analyze training for this specific person-position combination
-                analysis = self.analyze_personnel_training(pcode, dealer_name, pos)
-                if not analysis:
-                    continue
-
-                # Calculate progress percentages
-                after_progress = self._calculate_progress_percentage(analysis, 'after')
-                sales_progress = self._calculate_progress_percentage(analysis, 'sales')
-
-                summary_list.append({
-                    'name': name,
-                    'position': pos,
-                    'after_progress': after_progress,
-                    'sales_progress': sales_progress,
-                })
-        
+        summary = self._summary_cache(dealer_name, self.dm.data_version)
+        return [dict(entry) for entry in summary]
+
+    def _build_dealer_personnel_summary(self, dealer_name, data_version):
+        """Builds generate_dealer_personnel_summary's result for the current data (data_version keys the cache)."""
+        table = self._dealer_compliance(dealer_name)
+        if table.empty:
+            return []
+
+        # One entry per person-position, named after the first row listing it
+        roles = table.drop_duplicates('role').drop_duplicates(['pcode', 'position'])
+
+        counts = table[table['criterion'].notna()].groupby(['role', 'section'])['passed'].agg(['size', 'sum'])
+        progress = {key: _format_progress(int(passed), int(total))
+                    for key, total, passed in zip(counts.index, counts['size'], counts['sum'])}
+
+        summary_list = [{
+            'name': name,
+            'position': pos,
+            'after_progress': progress.get((role, 'after'), "-"),
+            'sales_progress': progress.get((role, 'sales'), "-"),
+        } for role, name, pos in zip(roles['role'], roles['name'], roles['position'])]
+
         # Sort by name and position for consistent display
         summary_list.sort(key=lambda x: (x['name'], x['position']))
         return summary_list
 
-    def _calculate_progress_percentage(self, analysis, section_type):
-        """
-        Calculate the percentage of completed requirements for a given section.
-        
-        Args:
-            analysis: The analysis result from analyze_personnel_training()
-            section_type: Either 'sales' or 'after'
-        
-        Returns:
-            String: Percentage as "XX%" or "-" if no requirements
-        """
-        if not analysis or 'requirements' not in analysis:
-            return "-"
-        
-        requirements = analysis['requirements']
-        pass_statuses = analysis.get('pass_statuses', {})
-        
-        # Check if this section exists in requirements
-        if section_type not in requirements:
-            return "-"
-        
-        section_requirements = requirements[section_type]
-        if not section_requirements:
-            return "-"
-        
-        # Count total requirements and passed requirements
-        total_requirements = 0
-        passed_requirements = 0
-        
-        for car, criteria_dict in section_requirements.items():
-            for criteria, courses in criteria_dict.items():
-                total_requirements += 1
-                # Check if this specific requirement is passed
-                if (section_type in pass_statuses and 
-                    car in pass_statuses[section_type] and 
-                    criteria in pass_statuses[section_type][car] and 
-                    pass_statuses[section_type][car][criteria]):
-                    passed_requirements += 1
-        
-        if total_requirements == 0:
-            return "-"
-        
-        percentage = (passed_requirements / total_requirements) * 100
-        return f"{percentage:.1f}%"
-
     def generate_dealer_export_df(self, dealer_name):
         """
         Generates a detailed DataFrame for a single dealer, suitable for export.
         This replaces the old `get_dealer_criteria_data` method.
         """
-        dealer_personnel = self.dm.get_personnel_for_dealer(dealer_name)
-        
-        export_rows = []
-        seen_combinations = set()
-
-        for _, row in dealer_personnel.iterrows():
-            name = row['نام و نام خانوادگی']
-            pcode = row.get('کد پرسنلی', '')
-            
-            positions = []
-            if pd.notna(row.get('عنوان شغل')) and row.get('عنوان شغل').strip():
-                positions.append(row.get('عنوان شغل').strip())
-            if pd.notna(row.get('شغل موازی (ارتقا)')) and row.get('شغل موازی (ارتقا)').strip():
-                positions.extend([p.strip() for p in row.get('شغل موازی (ارتقا)').split('&&&') if p.strip()])
-            
-            for pos in positions:
-                # Use a more comprehensive key to avoid duplicates
-                combination_key = (name, pos, pcode)
-                if combination_key in seen_combinations:
-                    continue
-                seen_combinations.add(combination_key)
-
-                # Only process positions that can be mapped
-                if pos not in self.dm.position_mapping:
-                    continue
-
-                analysis = self.analyze_personnel_training(pcode, dealer_name, pos)
-                if not analysis:
-                    continue
-                
-                # Convert analysis results to flat rows for DataFrame export
-                for file, cars in analysis['requirements'].items():
-                    for car, criteria_dict in cars.items():
-                        for crit, courses in criteria_dict.items():
-                            is_passed = analysis['pass_statuses'].get(file, {}).get(car, {}).get(crit, False)
-                            
-                            # Determine the reason/status text
-                            reason = "گذرانده نشده"
-                            if is_passed:
-                                if "گازسوز" in crit:
-                                    reason = "گازسوز (معاف)"
-                                elif "ابزار مخصوص" in crit:
-                                    reason = "ابزار مخصوص (شرطی)"
-                                else:
-                                    # Find which course was passed
-                                    passed_course = next((c for c in courses if c in analysis['passed_courses_set']), "تکمیل شده")
-                                    reason = passed_course
-                            elif "ابزار مخصوص" in crit:
-                                reason = "ابزار مخصوص (سایر معیارها تکمیل نشده)"
-
-                            export_rows.append({
-                                'نمایندگی': dealer_name,
-                                'نام پرسنل': name,
-                                'سمت': pos,
-                                'معیار': crit,
-                                'دسته': "خدمات پس از فروش" if file == "after" else "فروش",
-                                'خودرو': car,
-                                'گذرانده شده': 'بله' if is_passed else 'خیر',
-                                'دلیل': reason
-                            })
-
-        return pd.DataFrame(export_rows)
\ No newline at end of file
+        table = self._dealer_compliance(dealer_name)
+        table = table[table['criterion'].notna()]
+        if table.empty:
+            return pd.DataFrame()
+
+        criteria = table['criterion']
+        passed = table['passed'].to_numpy()
+        gas_exempt = criteria.str.contains('گازسوز', regex=False).to_numpy()
+        special = criteria.str.contains('ابزار مخصوص', regex=False).to_numpy()
+
+        # Determine the reason/status text
+        reason = np.select(
+            [passed & gas_exempt, passed & special, passed, special],
+            ["گازسوز (معاف)", "ابزار مخصوص (شرطی)",
+             table['passed_course'].fillna("تکمیل شده").to_numpy(),
+             "ابزار مخصوص (سایر معیارها تکمیل نشده)"],
+            "گذرانده نشده")
+
+        return pd.DataFrame({
+            'نمایندگی': dealer_name,
+            'نام پرسنل': table['name'].to_numpy(),
+            'سمت': table['position'].to_numpy(),
+            'معیار': criteria.to_numpy(),
+            'دسته': np.where(table['section'] == "after", "خدمات پس از فروش", "فروش"),
+            'خودرو': table['car'].to_numpy(),
+            'گذرانده شده': np.where(passed, 'بله', 'خیر'),
+            'دلیل': reason,
+        })